@@ -0,0 +1,70 @@
+"""
+Context Budget
+Token counting and history compaction for chat prompts
+"""
+
+import os
+from typing import Callable, Dict, List
+
+from models import TOKENIZER_AVAILABLE, tokenizer
+
+CONTEXT_BUDGET_TOKENS = int(os.getenv('NEUROLINKER_CONTEXT_BUDGET_TOKENS', '8192'))
+COMPACT_AT = 0.9  # fraction of the budget that triggers a summary
+KEEP_RECENT_MESSAGES = 6  # last 3 turns stay verbatim
+DECISION_CONTEXT_TOKENS = 300  # past-decision excerpts in the suggestion context
+REVIEW_SUMMARY_TOKENS = 100  # description excerpts in review summaries
+
+SUMMARY_PROMPT = """Summarize the following conversation in at most 300 tokens.
+Preserve every decision, option, constraint and conclusion mentioned.
+
+"""
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in text"""
+    if not text:
+        return 0
+    # Without tiktoken, estimate ~4 characters per token
+    if TOKENIZER_AVAILABLE:
+        return len(tokenizer().encode(text))
+    return len(text) // 4 + 1
+
+
+def fit_tokens(text: str, budget: int) -> str:
+    """Truncate text to at most budget tokens, marking the cut with an ellipsis"""
+    if not text:
+        return ''
+    if TOKENIZER_AVAILABLE:
+        ids = tokenizer().encode(text)
+        if len(ids) <= budget:
+            return text
+        return tokenizer().decode(ids[:budget]) + '…'
+    limit = budget * 4
+    return text if len(text) <= limit else text[:limit] + '…'
+
+
+def estimate_tokens(msg: Dict) -> int:
+    """Tokens taken by one chat message's content"""
+    return count_tokens(msg.get('content', ''))
+
+
+def compact_history(history: List[Dict], summarize: Callable[[str], str],
+                    reserved_tokens: int = 0,
+                    budget: int = CONTEXT_BUDGET_TOKENS,
+                    keep_recent: int = KEEP_RECENT_MESSAGES) -> List[Dict]:
+    """
+    Return history unchanged while it fits in the budget; otherwise replace
+    everything but the last keep_recent messages with one summary message.
+    reserved_tokens covers the prompt sent alongside the history.
+    """
+    if len(history) <= keep_recent:
+        return history
+
+    used = reserved_tokens + sum(estimate_tokens(m) for m in history)
+    if used <= COMPACT_AT * budget:
+        return history
+
+    older, recent = history[:-keep_recent], history[-keep_recent:]
+    transcript = '\n'.join(f"{m['role']}: {m['content']}" for m in older)
+    summary = summarize(SUMMARY_PROMPT + transcript)
+    return [{'role': 'system', 'content': f"Summary:\n{summary}", 'is_summary': True}] + list(recent)
@@ -1,3 +1,4 @@
+"""
 Firestore-backed DB with JSON fallback.
 Drop-in replacement for the existing SQLite-based DatabaseManager.
 """
@@ -5,8 +6,13 @@ Drop-in replacement for the existing SQLite-based DatabaseManager.
 import os
 import json
 import hashlib
+import hmac
+import heapq
+import threading
+import time
+import uuid
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 # Try to import firebase-admin
 _fire_imported = False
@@ -21,21 +27,74 @@ except Exception:
 DATA_DIR = "data"
 os.makedirs(DATA_DIR, exist_ok=True)
 
+# Serialized form of an empty table, written without calling the encoder
+_EMPTY_TABLE = "[]"
+
+# How long user/preference reads are served from memory (seconds)
+USER_CACHE_TTL = 600
+
+
+def _hash_password(password: str, salt: Optional[bytes] = None) -> str:
+    # scrypt KDF stored as "salt$hash"; hashlib hands this to OpenSSL
+    salt = salt or os.urandom(16)
+    key = hashlib.scrypt(password.encode(), salt=salt, n=2**14, r=8, p=1)
+    return f"{salt.hex()}${key.hex()}"
+
+
+def _verify_password(password: str, password_hash: Optional[str]) -> bool:
+    if not password_hash:
+        return False
+    if _is_legacy_hash(password_hash):
+        legacy = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(legacy, password_hash)
+    try:
+        salt = bytes.fromhex(password_hash.split("$", 1)[0])
+    except ValueError:
+        # corrupted stored hash: a failed login, not a crash
+        return False
+    return hmac.compare_digest(_hash_password(password, salt), password_hash)
+
+
+def _is_legacy_hash(password_hash: str) -> bool:
+    # unsalted SHA-256 from accounts migrated from SQLite; upgraded on login
+    return "$" not in password_hash
+
+
+# Decision columns written by save_decision, fixed once at import
+_DECISION_FIELDS = (
+    "title", "description", "goal", "constraints", "alternatives",
+    "final_choice", "reasoning", "expected_outcome", "memory_layer",
+    "tags", "reflection", "outcome_status",
+)
+_DECISION_LIST_FIELDS = ("constraints", "alternatives", "tags")
+
+
+def _decision_fields(decision_data: Dict) -> Dict[str, Any]:
+    fields = {k: decision_data.get(k) for k in _DECISION_FIELDS}
+    for k in _DECISION_LIST_FIELDS:
+        if k not in decision_data:
+            fields[k] = []
+    if "memory_layer" not in decision_data:
+        fields["memory_layer"] = "private"
+    return fields
 
-def _hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode()).hexdigest()
+
+def _doc_with_id(doc) -> Dict:
+    # to_dict() already returns a fresh dict; tag it in place instead of copying
+    d = doc.to_dict()
+    d["id"] = doc.id
+    return d
 
 
 def _gen_id() -> str:
-    import uuid
-    return str(uuid.uuid4())
+    return uuid.uuid4().hex
 
 
 # ----------------------
 # JSON-backed manager
 # ----------------------
 class JSONDatabaseManager:
-    def _init_(self, data_dir: str = DATA_DIR):
+    def __init__(self, data_dir: str = DATA_DIR):
         self.data_dir = data_dir
         self._files = {
             "users": os.path.join(self.data_dir, "users.json"),
@@ -46,41 +105,74 @@ class JSONDatabaseManager:
         for p in self._files.values():
             if not os.path.exists(p):
                 with open(p, "w", encoding="utf-8") as f:
-                    json.dump([], f)
+                    f.write(_EMPTY_TABLE)
+        # Each file is parsed once and kept in memory for the lifetime of the
+        # manager; writes go through to disk but reads never reopen the file.
+        self._tables: Dict[str, List[Dict[str, Any]]] = {}
+        # writers hold the lock across read-modify-write; reentrant so that
+        # _load/_save can take it again inside
+        self._lock = threading.RLock()
+        # decisions keyed by their id, rebuilt after each write
+        self._decisions_by_id: Optional[Dict[str, Dict[str, Any]]] = None
 
     def _load(self, key: str) -> List[Dict[str, Any]]:
-        with open(self._files[key], "r", encoding="utf-8") as f:
-            return json.load(f)
+        # readers only take the lock for the first parse of a file
+        table = self._tables.get(key)
+        if table is not None:
+            return table
+        with self._lock:
+            if key not in self._tables:
+                with open(self._files[key], "r", encoding="utf-8") as f:
+                    self._tables[key] = json.load(f)
+            return self._tables[key]
 
     def _save(self, key: str, data: List[Dict[str, Any]]):
-        with open(self._files[key], "w", encoding="utf-8") as f:
-            json.dump(data, f, default=str, ensure_ascii=False, indent=2)
+        with self._lock:
+            # disk first, via a temp file: a failed write leaves both the file
+            # and the cached table as they were
+            path = self._files[key]
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, default=str, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, path)
+            self._tables[key] = data
+            if key == "decisions":
+                self._decisions_by_id = None
+
+    def _decision_index(self) -> Dict[str, Dict[str, Any]]:
+        if self._decisions_by_id is None:
+            self._decisions_by_id = {d["id"]: d for d in self._load("decisions")}
+        return self._decisions_by_id
 
     # --- Users ---
     def create_user(self, email: str, password: str, full_name: str = "") -> bool:
-        users = self._load("users")
-        if any(u["email"] == email for u in users):
-            return False
-        uid = len(users) + 1
-        users.append({
-            "id": uid,
-            "email": email,
-            "password_hash": _hash_password(password),
-            "full_name": full_name,
-            "created_at": datetime.utcnow().isoformat()
-        })
-        self._save("users", users)
-        # default preferences
-        prefs = self._load("preferences")
-        prefs.append({"user_id": uid, "share_data_with_ai": False, "view_chat_history": True})
-        self._save("preferences", prefs)
+        password_hash = _hash_password(password)
+        with self._lock:
+            users = self._load("users")
+            if any(u["email"] == email for u in users):
+                return False
+            uid = len(users) + 1
+            self._save("users", users + [{
+                "id": uid,
+                "email": email,
+                "password_hash": password_hash,
+                "full_name": full_name,
+                "created_at": datetime.utcnow().isoformat()
+            }])
+            # default preferences
+            prefs = self._load("preferences")
+            self._save("preferences", prefs + [{"user_id": uid, "share_data_with_ai": False, "view_chat_history": True}])
         return True
 
     def authenticate_user(self, email: str, password: str) -> Optional[int]:
-        users = self._load("users")
-        for u in users:
-            if u["email"] == email and u["password_hash"] == _hash_password(password):
-                return u["id"]
+        # emails are unique: stop at the first match instead of scanning on
+        u = next((u for u in self._load("users") if u["email"] == email), None)
+        if u and _verify_password(password, u["password_hash"]):
+            if _is_legacy_hash(u["password_hash"]):
+                upgraded = {**u, "password_hash": _hash_password(password)}
+                with self._lock:
+                    self._save("users", [upgraded if x["id"] == u["id"] else x for x in self._load("users")])
+            return u["id"]
         return None
 
     def get_user(self, user_id: int) -> Optional[Dict]:
@@ -98,97 +190,107 @@ class JSONDatabaseManager:
         return None
 
     def update_user_password(self, user_id: int, new_password: str) -> bool:
-        users = self._load("users")
-        for u in users:
-            if u["id"] == user_id:
-                u["password_hash"] = _hash_password(new_password)
-                self._save("users", users)
-                return True
-        return False
+        password_hash = _hash_password(new_password)
+        with self._lock:
+            users = self._load("users")
+            if not any(u["id"] == user_id for u in users):
+                return False
+            self._save("users", [
+                {**u, "password_hash": password_hash} if u["id"] == user_id else u
+                for u in users
+            ])
+        return True
 
     # --- Decisions ---
     def save_decision(self, user_id: int, decision_data: Dict) -> str:
-        decisions = self._load("decisions")
         decision_id = decision_data.get("id") or _gen_id()
-        found = None
-        for d in decisions:
-            if d["id"] == decision_id and d["user_id"] == user_id:
-                found = d
-                break
-        payload = {
-            "id": decision_id,
-            "user_id": user_id,
-            "title": decision_data.get("title"),
-            "description": decision_data.get("description"),
-            "goal": decision_data.get("goal"),
-            "constraints": decision_data.get("constraints", []),
-            "alternatives": decision_data.get("alternatives", []),
-            "final_choice": decision_data.get("final_choice"),
-            "reasoning": decision_data.get("reasoning"),
-            "expected_outcome": decision_data.get("expected_outcome"),
-            "memory_layer": decision_data.get("memory_layer", "private"),
-            "tags": decision_data.get("tags", []),
-            "reflection": decision_data.get("reflection"),
-            "outcome_status": decision_data.get("outcome_status"),
-            "created_at": datetime.utcnow().isoformat()
-        }
-        if found:
-            found.update(payload)
-        else:
-            decisions.insert(0, payload)
-        self._save("decisions", decisions)
+        payload = {"id": decision_id, "user_id": user_id}
+        payload.update(_decision_fields(decision_data))
+        payload["created_at"] = datetime.utcnow().isoformat()
+        with self._lock:
+            decisions = self._load("decisions")
+            found = self._decision_index().get(decision_id)
+            if found and found["user_id"] != user_id:
+                # id belongs to another user: leave it untouched
+                return decision_id
+            # build a new table so the cache only changes once the write succeeds
+            if found:
+                # upsert: keep the original creation time on update
+                payload["created_at"] = found.get("created_at", payload["created_at"])
+                updated = {**found, **payload}
+                new = [updated if d is found else d for d in decisions]
+            else:
+                new = [payload] + decisions
+            self._save("decisions", new)
         return decision_id
 
+    # reads hand out shallow copies so callers can't edit the cached rows
     def get_decision(self, user_id: int, decision_id: str) -> Optional[Dict]:
-        decisions = self._load("decisions")
-        for d in decisions:
-            if d["id"] == decision_id and d["user_id"] == user_id:
-                return d
+        d = self._decision_index().get(decision_id)
+        if d and d["user_id"] == user_id:
+            return dict(d)
         return None
 
     def get_user_decisions(self, user_id: int, limit: int = None) -> List[Dict]:
-        decisions = [d for d in self._load("decisions") if d["user_id"] == user_id]
-        decisions.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-        return decisions[:limit] if limit else decisions
+        mine = (d for d in self._load("decisions") if d["user_id"] == user_id)
+        by_created = lambda x: x.get("created_at", "")
+        if limit:
+            return [dict(d) for d in heapq.nlargest(limit, mine, key=by_created)]
+        return [dict(d) for d in sorted(mine, key=by_created, reverse=True)]
 
     def delete_decision(self, user_id: int, decision_id: str) -> bool:
-        decisions = self._load("decisions")
-        new = [d for d in decisions if not (d["id"] == decision_id and d["user_id"] == user_id)]
-        changed = len(new) != len(decisions)
-        if changed:
-            self._save("decisions", new)
+        with self._lock:
+            decisions = self._load("decisions")
+            new = [d for d in decisions if not (d["id"] == decision_id and d["user_id"] == user_id)]
+            changed = len(new) != len(decisions)
+            if changed:
+                self._save("decisions", new)
         return changed
 
     # --- Chat ---
     def save_chat_message(self, user_id: int, user_message: str, ai_response: str,
                           chat_type: str = "decision_recording", decision_id: str = None,
                           is_visible: bool = True) -> int:
-        chat = self._load("chat")
-        cid = len(chat) + 1
-        chat.append({
-            "id": cid,
-            "user_id": user_id,
-            "decision_id": decision_id,
-            "chat_type": chat_type,
-            "user_message": user_message,
-            "ai_response": ai_response,
-            "timestamp": datetime.utcnow().isoformat(),
-            "is_visible_to_user": bool(is_visible)
-        })
-        self._save("chat", chat)
-        return cid
+        return self.save_chat_messages(user_id, [(user_message, ai_response)], chat_type,
+                                       decision_id, is_visible)[0]
+
+    def save_chat_messages(self, user_id: int, exchanges: List[Tuple[str, str]],
+                           chat_type: str = "decision_recording", decision_id: str = None,
+                           is_visible: bool = True) -> List[int]:
+        if not exchanges:
+            return []
+        with self._lock:
+            chat = self._load("chat")
+            rows = [{
+                "id": len(chat) + i,
+                "user_id": user_id,
+                "decision_id": decision_id,
+                "chat_type": chat_type,
+                "user_message": user_message,
+                "ai_response": ai_response,
+                "timestamp": datetime.utcnow().isoformat(),
+                "is_visible_to_user": bool(is_visible)
+            } for i, (user_message, ai_response) in enumerate(exchanges, 1)]
+            self._save("chat", chat + rows)
+        return [r["id"] for r in rows]
 
     def get_chat_history(self, user_id: int, decision_id: str = None,
-                         chat_type: str = None, include_hidden: bool = False) -> List[Dict]:
-        chat = [c for c in self._load("chat") if c["user_id"] == user_id]
-        if decision_id:
-            chat = [c for c in chat if c["decision_id"] == decision_id]
-        if chat_type:
-            chat = [c for c in chat if c["chat_type"] == chat_type]
-        if not include_hidden:
-            chat = [c for c in chat if c.get("is_visible_to_user", True)]
-        chat.sort(key=lambda x: x.get("timestamp"))
-        return chat
+                         chat_type: str = None, include_hidden: bool = False,
+                         limit: int = None, after: Optional[Dict] = None) -> List[Dict]:
+        # keyset pagination: pass the last row of the previous page as after;
+        # rows are ordered by (timestamp, id) so equal timestamps aren't skipped
+        cursor = (after["timestamp"], after["id"]) if after else None
+        # one pass over the table instead of a list copy per filter
+        chat = [
+            c for c in self._load("chat")
+            if c["user_id"] == user_id
+            and (not decision_id or c["decision_id"] == decision_id)
+            and (not chat_type or c["chat_type"] == chat_type)
+            and (include_hidden or c.get("is_visible_to_user", True))
+            and (cursor is None or (c["timestamp"], c["id"]) > cursor)
+        ]
+        chat.sort(key=lambda x: (x.get("timestamp"), x["id"]))
+        return [dict(c) for c in (chat[:limit] if limit else chat)]
 
     def get_chat_history_for_decision(self, user_id: int, decision_id: str) -> List[Dict]:
         return self.get_chat_history(user_id, decision_id=decision_id, include_hidden=True)
@@ -205,16 +307,19 @@ class JSONDatabaseManager:
         return {"share_data_with_ai": False, "view_chat_history": True}
 
     def update_user_preferences(self, user_id: int, preferences: Dict) -> bool:
-        prefs = self._load("preferences")
-        for p in prefs:
-            if p["user_id"] == user_id:
-                p["share_data_with_ai"] = bool(preferences.get("share_data_with_ai", p.get("share_data_with_ai", False)))
-                p["view_chat_history"] = bool(preferences.get("view_chat_history", p.get("view_chat_history", True)))
-                self._save("preferences", prefs)
-                return True
-        # create if missing
-        prefs.append({"user_id": user_id, "share_data_with_ai": bool(preferences.get("share_data_with_ai", False)), "view_chat_history": bool(preferences.get("view_chat_history", True))})
-        self._save("preferences", prefs)
+        with self._lock:
+            prefs = self._load("preferences")
+            for i, p in enumerate(prefs):
+                if p["user_id"] == user_id:
+                    updated = {
+                        **p,
+                        "share_data_with_ai": bool(preferences.get("share_data_with_ai", p.get("share_data_with_ai", False))),
+                        "view_chat_history": bool(preferences.get("view_chat_history", p.get("view_chat_history", True))),
+                    }
+                    self._save("preferences", prefs[:i] + [updated] + prefs[i + 1:])
+                    return True
+            # create if missing
+            self._save("preferences", prefs + [{"user_id": user_id, "share_data_with_ai": bool(preferences.get("share_data_with_ai", False)), "view_chat_history": bool(preferences.get("view_chat_history", True))}])
         return True
 
 
@@ -222,7 +327,7 @@ class JSONDatabaseManager:
 # Firestore-backed manager
 # ----------------------
 class FirestoreDatabaseManager:
-    def _init_(self, cred_path: Optional[str] = None):
+    def __init__(self, cred_path: Optional[str] = None):
         if not _fire_imported:
             raise RuntimeError("firebase-admin not installed")
         if not firebase_admin._apps:
@@ -236,6 +341,22 @@ class FirestoreDatabaseManager:
         self.decisions = self.client.collection("decisions")
         self.chat = self.client.collection("chat_history")
         self.prefs = self.client.collection("user_preferences")
+        # key -> (expires_at, value); invalidated on the matching update
+        self._user_cache: Dict[str, Tuple[float, Dict]] = {}
+        self._email_cache: Dict[str, Tuple[float, Dict]] = {}
+        self._prefs_cache: Dict[str, Tuple[float, Dict]] = {}
+
+    @staticmethod
+    def _cached(cache: Dict[str, Tuple[float, Dict]], key: str) -> Optional[Dict]:
+        hit = cache.get(key)
+        if hit and hit[0] > time.monotonic():
+            return dict(hit[1])
+        return None
+
+    @staticmethod
+    def _remember(cache: Dict[str, Tuple[float, Dict]], key: str, value: Dict) -> Dict:
+        cache[key] = (time.monotonic() + USER_CACHE_TTL, dict(value))
+        return value
 
     # --- Users ---
     def create_user(self, email: str, password: str, full_name: str = "") -> bool:
@@ -244,63 +365,62 @@ class FirestoreDatabaseManager:
             return False
         doc = {"email": email, "password_hash": _hash_password(password), "full_name": full_name, "created_at": firestore.SERVER_TIMESTAMP}
         ref = self.users.document()
-        ref.set(doc)
         uid = ref.id
-        self.prefs.document(uid).set({"user_id": uid, "share_data_with_ai": False, "view_chat_history": True})
+        # user + default preferences land in one commit
+        batch = self.client.batch()
+        batch.set(ref, doc)
+        batch.set(self.prefs.document(uid), {"user_id": uid, "share_data_with_ai": False, "view_chat_history": True})
+        batch.commit()
         return True
 
     def authenticate_user(self, email: str, password: str) -> Optional[str]:
-        q = self.users.where("email", "==", email).limit(1).get()
+        # fetch only the hash field, not the whole user document
+        q = self.users.where("email", "==", email).select(["password_hash"]).limit(1).get()
         for doc in q:
-            data = doc.to_dict()
-            if data.get("password_hash") == _hash_password(password):
+            if _verify_password(password, doc.get("password_hash")):
+                if _is_legacy_hash(doc.get("password_hash")):
+                    self.users.document(doc.id).update({"password_hash": _hash_password(password)})
                 return doc.id
         return None
 
     def get_user(self, user_id: str) -> Optional[Dict]:
+        cached = self._cached(self._user_cache, user_id)
+        if cached is not None:
+            return cached
         doc = self.users.document(user_id).get()
         if doc.exists:
             d = doc.to_dict()
             d.pop("password_hash", None)
             d["id"] = doc.id
-            return d
+            return self._remember(self._user_cache, user_id, d)
         return None
 
     def get_user_by_email(self, email: str) -> Optional[Dict]:
+        cached = self._cached(self._email_cache, email)
+        if cached is not None:
+            return cached
         q = self.users.where("email", "==", email).limit(1).get()
         for doc in q:
             d = doc.to_dict()
             d.pop("password_hash", None)
             d["id"] = doc.id
-            return d
+            return self._remember(self._email_cache, email, d)
         return None
 
     def update_user_password(self, user_id: str, new_password: str) -> bool:
         doc = self.users.document(user_id)
         if doc.get().exists:
             doc.update({"password_hash": _hash_password(new_password)})
+            self._user_cache.pop(user_id, None)
             return True
         return False
 
     # --- Decisions ---
     def save_decision(self, user_id: str, decision_data: Dict) -> str:
         decision_id = decision_data.get("id") or _gen_id()
-        payload = {
-            "user_id": user_id,
-            "title": decision_data.get("title"),
-            "description": decision_data.get("description"),
-            "goal": decision_data.get("goal"),
-            "constraints": decision_data.get("constraints", []),
-            "alternatives": decision_data.get("alternatives", []),
-            "final_choice": decision_data.get("final_choice"),
-            "reasoning": decision_data.get("reasoning"),
-            "expected_outcome": decision_data.get("expected_outcome"),
-            "memory_layer": decision_data.get("memory_layer", "private"),
-            "tags": decision_data.get("tags", []),
-            "reflection": decision_data.get("reflection"),
-            "outcome_status": decision_data.get("outcome_status"),
-            "created_at": firestore.SERVER_TIMESTAMP
-        }
+        payload = {"user_id": user_id}
+        payload.update(_decision_fields(decision_data))
+        payload["created_at"] = firestore.SERVER_TIMESTAMP
         self.decisions.document(decision_id).set(payload, merge=True)
         return decision_id
 
@@ -317,7 +437,7 @@ class FirestoreDatabaseManager:
         q = self.decisions.where("user_id", "==", user_id).order_by("created_at", direction=firestore.Query.DESCENDING)
         if limit:
             q = q.limit(limit)
-        return [{**doc.to_dict(), "id": doc.id} for doc in q.stream()]
+        return [_doc_with_id(doc) for doc in q.stream()]
 
     def delete_decision(self, user_id: str, decision_id: str) -> bool:
         doc_ref = self.decisions.document(decision_id)
@@ -344,8 +464,37 @@ class FirestoreDatabaseManager:
         ref.set(payload)
         return ref.id
 
+    def save_chat_messages(self, user_id: str, exchanges: List[Tuple[str, str]],
+                           chat_type: str = "decision_recording", decision_id: str = None,
+                           is_visible: bool = True) -> List[str]:
+        ids = []
+        batch = self.client.batch()
+        pending = 0
+        for user_message, ai_response in exchanges:
+            ref = self.chat.document()
+            batch.set(ref, {
+                "user_id": user_id,
+                "decision_id": decision_id,
+                "chat_type": chat_type,
+                "user_message": user_message,
+                "ai_response": ai_response,
+                "timestamp": firestore.SERVER_TIMESTAMP,
+                "is_visible_to_user": bool(is_visible),
+            })
+            ids.append(ref.id)
+            pending += 1
+            # Firestore caps a batch at 500 writes
+            if pending == 500:
+                batch.commit()
+                batch = self.client.batch()
+                pending = 0
+        if pending:
+            batch.commit()
+        return ids
+
     def get_chat_history(self, user_id: str, decision_id: str = None,
-                         chat_type: str = None, include_hidden: bool = False) -> List[Dict]:
+                         chat_type: str = None, include_hidden: bool = False,
+                         limit: int = None, after: Optional[Dict] = None) -> List[Dict]:
         q = self.chat.where("user_id", "==", user_id)
         if decision_id:
             q = q.where("decision_id", "==", decision_id)
@@ -353,25 +502,41 @@ class FirestoreDatabaseManager:
             q = q.where("chat_type", "==", chat_type)
         if not include_hidden:
             q = q.where("is_visible_to_user", "==", True)
-        q = q.order_by("timestamp")
-        return [{**doc.to_dict(), "id": doc.id} for doc in q.stream()]
+        # keyset pagination: pass the last row of the previous page as after.
+        # A batch shares one server timestamp, so the document id breaks ties.
+        q = q.order_by("timestamp").order_by("__name__")
+        if after:
+            # cursor built from the row's own values: no extra read, and it
+            # still advances if that message has since been deleted
+            q = q.start_after({
+                "timestamp": after["timestamp"],
+                "__name__": self.chat.document(after["id"]),
+            })
+        if limit:
+            q = q.limit(limit)
+        return [_doc_with_id(doc) for doc in q.stream()]
 
     def get_chat_history_for_decision(self, user_id: str, decision_id: str) -> List[Dict]:
         return self.get_chat_history(user_id, decision_id=decision_id, include_hidden=True)
 
     # --- Preferences ---
     def get_user_preferences(self, user_id: str) -> Dict:
+        cached = self._cached(self._prefs_cache, user_id)
+        if cached is not None:
+            return cached
         doc = self.prefs.document(user_id).get()
         if doc.exists:
             d = doc.to_dict()
-            return {"share_data_with_ai": bool(d.get("share_data_with_ai", False)), "view_chat_history": bool(d.get("view_chat_history", True))}
+            return self._remember(self._prefs_cache, user_id, {"share_data_with_ai": bool(d.get("share_data_with_ai", False)), "view_chat_history": bool(d.get("view_chat_history", True))})
         return {"share_data_with_ai": False, "view_chat_history": True}
 
     def update_user_preferences(self, user_id: str, preferences: Dict) -> bool:
         self.prefs.document(user_id).set({
+            "user_id": user_id,
             "share_data_with_ai": bool(preferences.get("share_data_with_ai", False)),
             "view_chat_history": bool(preferences.get("view_chat_history", True))
         }, merge=True)
+        self._prefs_cache.pop(user_id, None)
         return True
 
 
@@ -6,10 +6,44 @@ Core decision memory model and storage management
 import json
 import os
 from datetime import datetime
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, asdict, field
+from typing import Dict, List, Any, Optional, Set, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
-import hashlib
+from bisect import bisect_right
+from collections import Counter
+from contextlib import contextmanager
+import secrets
+import time
+
+# orjson is optional; fall back to the stdlib encoder when it's missing
+try:
+    import orjson
+    _orjson_imported = True
+except ImportError:
+    _orjson_imported = False
+
+# ijson is optional too; only used to stream very large snapshots
+try:
+    import ijson
+    _ijson_imported = True
+except ImportError:
+    _ijson_imported = False
+
+# Snapshots above this size are stream-parsed one decision at a time
+STREAM_PARSE_THRESHOLD = 10_000_000  # bytes
+
+
+def _to_timestamp(value) -> float:
+    """Normalize an ISO string or number to a Unix timestamp"""
+    if value is None:
+        return time.time()
+    try:
+        if isinstance(value, str):
+            return datetime.fromisoformat(value).timestamp()
+        return float(value)
+    except (TypeError, ValueError):
+        # Malformed legacy value (e.g. free text); don't fail the whole load
+        return time.time()
 
 
 class MemoryLayer(Enum):
@@ -19,6 +53,10 @@ class MemoryLayer(Enum):
     PUBLIC = "public"  # Can be exported/shared
 
 
+# Plain dict lookup; MemoryLayer(value) goes through EnumMeta.__call__ per record
+_LAYER_MAP = {m.value: m for m in MemoryLayer}
+
+
 @dataclass
 class Constraint:
     """Represents a constraint on a decision"""
@@ -27,7 +65,11 @@ class Constraint:
     severity: str  # low, medium, high
     
     def to_dict(self):
-        return asdict(self)
+        return {
+            'category': self.category,
+            'description': self.description,
+            'severity': self.severity,
+        }
 
 
 @dataclass
@@ -39,7 +81,12 @@ class Alternative:
     rejected_reason: Optional[str] = None
     
     def to_dict(self):
-        return asdict(self)
+        return {
+            'option': self.option,
+            'pros': list(self.pros),
+            'cons': list(self.cons),
+            'rejected_reason': self.rejected_reason,
+        }
 
 
 @dataclass
@@ -55,19 +102,48 @@ class Decision:
     reasoning: str  # Why this choice was made
     expected_outcome: Optional[str] = None
     related_decisions: List[str] = field(default_factory=list)
-    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
-    updated_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    created_at: float = field(default_factory=time.time)  # Unix timestamps; ISO strings on disk
+    updated_at: float = field(default_factory=time.time)
     memory_layer: MemoryLayer = MemoryLayer.PRIVATE
     tags: List[str] = field(default_factory=list)
     reflection: Optional[str] = None  # User's reflection on the decision
     outcome_status: Optional[str] = None  # pending, completed, reviewing
     
+    def __post_init__(self):
+        self.created_at = _to_timestamp(self.created_at)
+        self.updated_at = _to_timestamp(self.updated_at)
+        self.refresh_search_index()
+    
+    def refresh_search_index(self):
+        """Cache lowercased text used by search and similarity scoring"""
+        # Plain attributes rather than fields, so to_dict never serializes them
+        self._title_lower = (self.title or '').lower()
+        self._desc_lower = (self.description or '').lower()
+        self._goal_lower = (self.goal or '').lower()
+        self._reasoning_lower = (self.reasoning or '').lower()
+        self._goal_words = frozenset(w for w in self._goal_lower.split() if len(w) > 3)
+        self._tags_lower = frozenset(t.lower() for t in self.tags)
+    
     def to_dict(self):
-        data = asdict(self)
-        data['constraints'] = [c.to_dict() if isinstance(c, Constraint) else c for c in self.constraints]
-        data['alternatives'] = [a.to_dict() if isinstance(a, Alternative) else a for a in self.alternatives]
-        data['memory_layer'] = self.memory_layer.value
-        return data
+        # Built by hand: asdict() deep-copies every field and recurses
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'goal': self.goal,
+            'constraints': [c.to_dict() if isinstance(c, Constraint) else c for c in self.constraints],
+            'alternatives': [a.to_dict() if isinstance(a, Alternative) else a for a in self.alternatives],
+            'final_choice': self.final_choice,
+            'reasoning': self.reasoning,
+            'expected_outcome': self.expected_outcome,
+            'related_decisions': list(self.related_decisions),
+            'created_at': datetime.fromtimestamp(self.created_at).isoformat(),
+            'updated_at': datetime.fromtimestamp(self.updated_at).isoformat(),
+            'memory_layer': self.memory_layer.value,
+            'tags': list(self.tags),
+            'reflection': self.reflection,
+            'outcome_status': self.outcome_status,
+        }
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]):
@@ -90,9 +166,72 @@ class Decision:
         
         # Convert memory_layer
         if isinstance(data.get('memory_layer'), str):
-            data['memory_layer'] = MemoryLayer(data['memory_layer'])
+            data['memory_layer'] = _LAYER_MAP[data['memory_layer']]
         
         return cls(**data)
+    
+    @classmethod
+    def _from_json_dict(cls, data: Dict[str, Any]):
+        """Fast path for records read back from the store's own JSON, where
+        nested constraints/alternatives are always plain dicts"""
+        now = None
+        if 'created_at' not in data or 'updated_at' not in data:
+            now = time.time()
+        layer = data.get('memory_layer')
+        return cls(
+            id=data['id'],
+            title=data['title'],
+            description=data['description'],
+            goal=data['goal'],
+            constraints=[Constraint(**c) for c in data.get('constraints') or ()],
+            alternatives=[Alternative(**a) for a in data.get('alternatives') or ()],
+            final_choice=data['final_choice'],
+            reasoning=data['reasoning'],
+            expected_outcome=data.get('expected_outcome'),
+            related_decisions=data.get('related_decisions') or [],
+            created_at=data.get('created_at', now),
+            updated_at=data.get('updated_at', now),
+            memory_layer=_LAYER_MAP[layer] if layer else MemoryLayer.PRIVATE,
+            tags=data.get('tags') or [],
+            reflection=data.get('reflection'),
+            outcome_status=data.get('outcome_status'),
+        )
+
+
+class _SubstringIndex:
+    """Lowercased texts joined into one string, so a query is located in all
+    of them with repeated C-level str.find calls instead of one `in` per record"""
+    
+    SEP = "\x00"
+    
+    def __init__(self, entries):
+        self._starts: List[int] = []
+        self._ids: List[str] = []
+        parts = []
+        pos = 0
+        for record_id, text in entries:
+            self._starts.append(pos)
+            self._ids.append(record_id)
+            parts.append(text)
+            pos += len(text) + 1
+        self._text = self.SEP.join(parts)
+    
+    def containing(self, query: str) -> Set[str]:
+        """Ids of every record whose text contains query"""
+        if not query:
+            return set(self._ids)
+        if self.SEP in query:
+            return set()
+        hits: Set[str] = set()
+        i = self._text.find(query)
+        while i != -1:
+            slot = bisect_right(self._starts, i) - 1
+            hits.add(self._ids[slot])
+            # Resume at the next record; one hit per record is enough
+            if slot + 1 >= len(self._starts):
+                break
+            i = self._text.find(query, self._starts[slot + 1])
+        return hits
 
 
 class DecisionMemoryStore:
@@ -100,27 +239,141 @@ class DecisionMemoryStore:
     
     def __init__(self, file_path: str = "human_ai_memory.json"):
         self.file_path = file_path
+        # Mutations are appended here and folded into file_path by compact()
+        self.log_path = os.path.splitext(file_path)[0] + ".log.jsonl"
         self.decisions: Dict[str, Decision] = {}
+        # goal word -> ids of decisions whose goal contains it
+        self._word_index: Dict[str, Set[str]] = {}
+        # lowercased tag -> ids of decisions carrying it
+        self._tag_index: Dict[str, Set[str]] = {}
+        # Built lazily from the cached lowercase text; dropped on any mutation
+        self._goal_search: Optional[_SubstringIndex] = None
+        self._text_search: Optional[_SubstringIndex] = None
+        # Newest-first ordering for get_all_decisions
+        self._sorted: Optional[List[Decision]] = None
+        # Mutations deferred by batch(): id -> latest Decision, or None if deleted
+        self._batch_depth = 0
+        self._pending: Dict[str, Optional[Decision]] = {}
         self.load_from_file()
     
     def load_from_file(self):
-        """Load decisions from JSON file"""
+        """Load decisions from the JSON snapshot, then replay the mutation log"""
         if os.path.exists(self.file_path):
+            load_errors = (json.JSONDecodeError, KeyError)
+            if _ijson_imported:
+                load_errors += (ijson.JSONError,)
             try:
-                with open(self.file_path, 'r') as f:
-                    data = json.load(f)
+                with open(self.file_path, 'rb') as f:
+                    if _ijson_imported and os.path.getsize(self.file_path) > STREAM_PARSE_THRESHOLD:
+                        self._stream_load(f)
+                        data = None
+                    else:
+                        data = orjson.loads(f.read()) if _orjson_imported else json.load(f)
                     if isinstance(data, list):
                         # Handle old format
                         for item in data:
-                            decision = Decision.from_dict(item)
+                            decision = Decision._from_json_dict(item)
                             self.decisions[decision.id] = decision
                     elif isinstance(data, dict):
                         for decision_id, decision_data in data.items():
-                            decision = Decision.from_dict(decision_data)
+                            decision = Decision._from_json_dict(decision_data)
                             self.decisions[decision_id] = decision
-            except (json.JSONDecodeError, KeyError) as e:
+            except load_errors as e:
                 print(f"Error loading decisions: {e}")
                 self.decisions = {}
+        self._replay_log()
+        self._rebuild_index()
+    
+    def _stream_load(self, f):
+        """Parse a large snapshot incrementally, holding one decision at a time"""
+        head = f.read(1)
+        while head and head.isspace():
+            head = f.read(1)
+        f.seek(0)
+        if head == b'[':
+            # Handle old format
+            for item in ijson.items(f, 'item', use_float=True):
+                decision = Decision._from_json_dict(item)
+                self.decisions[decision.id] = decision
+        else:
+            for decision_id, decision_data in ijson.kvitems(f, '', use_float=True):
+                self.decisions[decision_id] = Decision._from_json_dict(decision_data)
+    
+    def _replay_log(self):
+        """Apply logged put/del events on top of the loaded snapshot"""
+        if not os.path.exists(self.log_path):
+            return
+        complete = 0  # byte offset just past the last newline
+        with open(self.log_path, 'rb') as f:
+            for line in f:
+                if line.endswith(b'\n'):
+                    complete += len(line)
+                try:
+                    event = orjson.loads(line) if _orjson_imported else json.loads(line)
+                    if event.get('op') == 'put':
+                        self.decisions[event['id']] = Decision._from_json_dict(event['decision'])
+                    elif event.get('op') == 'del':
+                        self.decisions.pop(event['id'], None)
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    # A torn final line from an interrupted write, or an event
+                    # missing its fields; skip it rather than fail the load
+                    continue
+        if complete < os.path.getsize(self.log_path):
+            # Cut off a torn final line so the next append starts on a fresh one
+            os.truncate(self.log_path, complete)
+        self._maybe_compact()
+    
+    def _rebuild_index(self):
+        self._word_index = {}
+        self._tag_index = {}
+        self._goal_search = self._text_search = self._sorted = None
+        for decision_id, decision in self.decisions.items():
+            self._index_decision(decision_id, decision)
+    
+    def _index_decision(self, decision_id: str, decision: Decision):
+        self._goal_search = self._text_search = self._sorted = None
+        for word in decision._goal_words:
+            self._word_index.setdefault(word, set()).add(decision_id)
+        for tag in decision._tags_lower:
+            self._tag_index.setdefault(tag, set()).add(decision_id)
+    
+    def _unindex_decision(self, decision_id: str, decision: Decision):
+        self._goal_search = self._text_search = self._sorted = None
+        for index, tokens in ((self._word_index, decision._goal_words),
+                              (self._tag_index, decision._tags_lower)):
+            for token in tokens:
+                postings = index.get(token)
+                if postings:
+                    postings.discard(decision_id)
+                    if not postings:
+                        del index[token]
+    
+    def goals_containing(self, text: str) -> Set[str]:
+        """Ids of decisions whose lowercased goal contains text"""
+        if self._goal_search is None:
+            self._goal_search = _SubstringIndex(
+                (decision_id, d._goal_lower) for decision_id, d in self.decisions.items()
+            )
+        return self._goal_search.containing(text)
+    
+    def texts_containing(self, text: str) -> Set[str]:
+        """Ids of decisions whose lowercased description or reasoning contains text"""
+        if self._text_search is None:
+            self._text_search = _SubstringIndex(
+                (decision_id, field_text)
+                for decision_id, d in self.decisions.items()
+                for field_text in (d._desc_lower, d._reasoning_lower)
+            )
+        return self._text_search.containing(text)
+    
+    def count_token_matches(self, tokens) -> Tuple[Counter, Counter]:
+        """Per-decision counts of tokens found in its goal words and in its tags"""
+        word_hits: Counter = Counter()
+        tag_hits: Counter = Counter()
+        for token in tokens:
+            word_hits.update(self._word_index.get(token, ()))
+            tag_hits.update(self._tag_index.get(token, ()))
+        return word_hits, tag_hits
     
     def save_to_file(self):
         """Persist decisions to JSON file"""
@@ -128,22 +381,100 @@ class DecisionMemoryStore:
             decision_id: decision.to_dict() 
             for decision_id, decision in self.decisions.items()
         }
-        with open(self.file_path, 'w') as f:
-            json.dump(data, f, indent=2)
+        if _orjson_imported:
+            payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        else:
+            payload = json.dumps(data, indent=2).encode()
+        # Write beside the target and swap it in, so a crash mid-write
+        # leaves the previous snapshot intact instead of a truncated file
+        tmp_path = self.file_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.file_path)
+        # The snapshot now holds every logged or pending mutation
+        self._pending.clear()
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+    
+    def compact(self):
+        """Fold the mutation log into a fresh snapshot"""
+        self.save_to_file()
+    
+    @contextmanager
+    def batch(self):
+        """Group several mutations into a single log write
+        
+        Inside the block, the latest put/del per decision is held in memory
+        and written out once when the outermost batch exits.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._pending:
+                self._flush_pending()
+    
+    def _flush_pending(self):
+        events = [
+            {'op': 'put', 'id': decision_id, 'decision': decision.to_dict()}
+            if decision is not None else {'op': 'del', 'id': decision_id}
+            for decision_id, decision in self._pending.items()
+        ]
+        self._pending.clear()
+        self._write_events(events)
+    
+    def _write_events(self, events: List[Dict[str, Any]]):
+        """Record mutations without rewriting the whole snapshot"""
+        if _orjson_imported:
+            data = b''.join(orjson.dumps(event) + b'\n' for event in events)
+        else:
+            data = ''.join(json.dumps(event) + '\n' for event in events).encode()
+        with open(self.log_path, 'ab') as f:
+            f.write(data)
+        self._maybe_compact()
+    
+    def _log_put(self, decision: Decision):
+        if self._batch_depth:
+            # Replay is last-write-wins per id, so only the final state matters
+            self._pending[decision.id] = decision
+        else:
+            self._write_events([{'op': 'put', 'id': decision.id, 'decision': decision.to_dict()}])
+    
+    def _log_delete(self, decision_id: str):
+        if self._batch_depth:
+            self._pending[decision_id] = None
+        else:
+            self._write_events([{'op': 'del', 'id': decision_id}])
+    
+    def _maybe_compact(self):
+        """Compact once the log has grown past the snapshot it patches"""
+        if not os.path.exists(self.log_path):
+            return
+        snapshot_size = os.path.getsize(self.file_path) if os.path.exists(self.file_path) else 0
+        if os.path.getsize(self.log_path) > snapshot_size:
+            self.compact()
     
     def generate_id(self, title: str) -> str:
         """Generate unique decision ID"""
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        hash_obj = hashlib.md5((title + timestamp).encode())
-        return f"dec_{hash_obj.hexdigest()[:8]}"
+        # 32 random bits; retry on the rare clash with an existing id
+        decision_id = f"dec_{secrets.token_hex(4)}"
+        while decision_id in self.decisions:
+            decision_id = f"dec_{secrets.token_hex(4)}"
+        return decision_id
     
     def add_decision(self, decision: Decision) -> str:
         """Add a new decision to memory"""
         if not decision.id:
             decision.id = self.generate_id(decision.title)
         
+        if decision.id in self.decisions:
+            self._unindex_decision(decision.id, self.decisions[decision.id])
         self.decisions[decision.id] = decision
-        self.save_to_file()
+        self._index_decision(decision.id, decision)
+        self._log_put(decision)
         return decision.id
     
     def get_decision(self, decision_id: str) -> Optional[Decision]:
@@ -156,29 +487,35 @@ class DecisionMemoryStore:
             return False
         
         decision = self.decisions[decision_id]
-        decision.updated_at = datetime.now().isoformat()
+        decision.updated_at = time.time()
+        self._unindex_decision(decision_id, decision)
         
         for key, value in updates.items():
             if hasattr(decision, key):
+                if key in ('created_at', 'updated_at'):
+                    value = _to_timestamp(value)
                 setattr(decision, key, value)
+        decision.refresh_search_index()
+        self._index_decision(decision_id, decision)
         
-        self.save_to_file()
+        self._log_put(decision)
         return True
     
     def delete_decision(self, decision_id: str) -> bool:
         """Delete a decision (with user confirmation in UI)"""
         if decision_id in self.decisions:
-            del self.decisions[decision_id]
-            self.save_to_file()
+            self._unindex_decision(decision_id, self.decisions.pop(decision_id))
+            self._log_delete(decision_id)
             return True
         return False
     
     def get_all_decisions(self, memory_layer: Optional[MemoryLayer] = None) -> List[Decision]:
         """Get all decisions, optionally filtered by memory layer"""
-        decisions = list(self.decisions.values())
+        if self._sorted is None:
+            self._sorted = sorted(self.decisions.values(), key=lambda d: d.created_at, reverse=True)
         if memory_layer:
-            decisions = [d for d in decisions if d.memory_layer == memory_layer]
-        return sorted(decisions, key=lambda d: d.created_at, reverse=True)
+            return [d for d in self._sorted if d.memory_layer == memory_layer]
+        return list(self._sorted)
     
     def search_decisions(self, query: str) -> List[Decision]:
         """Search decisions by title, description, tags"""
@@ -186,9 +523,9 @@ class DecisionMemoryStore:
         results = []
         
         for decision in self.decisions.values():
-            if (query_lower in decision.title.lower() or
-                query_lower in decision.description.lower() or
-                any(query_lower in tag.lower() for tag in decision.tags)):
+            if (query_lower in decision._title_lower or
+                query_lower in decision._desc_lower or
+                any(query_lower in tag for tag in decision._tags_lower)):
                 results.append(decision)
         
         return sorted(results, key=lambda d: d.created_at, reverse=True)
@@ -214,24 +551,23 @@ class DecisionMemoryStore:
                 self.decisions[decision_id1].related_decisions.append(decision_id2)
             if decision_id1 not in self.decisions[decision_id2].related_decisions:
                 self.decisions[decision_id2].related_decisions.append(decision_id1)
-            self.save_to_file()
+            with self.batch():
+                self._log_put(self.decisions[decision_id1])
+                self._log_put(self.decisions[decision_id2])
     
     def get_decision_categories(self) -> Dict[str, int]:
         """Get count of decisions by tag/category"""
-        categories = {}
-        for decision in self.decisions.values():
-            for tag in decision.tags:
-                categories[tag] = categories.get(tag, 0) + 1
-        return categories
+        return dict(Counter(
+            tag for decision in self.decisions.values() for tag in decision.tags
+        ))
     
     def get_constraint_patterns(self) -> Dict[str, int]:
         """Analyze constraint patterns across decisions"""
-        patterns = {}
-        for decision in self.decisions.values():
-            for constraint in decision.constraints:
-                key = f"{constraint.category} ({constraint.severity})"
-                patterns[key] = patterns.get(key, 0) + 1
-        return patterns
+        return dict(Counter(
+            f"{constraint.category} ({constraint.severity})"
+            for decision in self.decisions.values()
+            for constraint in decision.constraints
+        ))
 
 
 class AIReasoningEngine:
@@ -246,36 +582,40 @@ class AIReasoningEngine:
     
     def find_similar_decisions(self, current_goal: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Find decisions with similar goals or context - only returns truly similar decisions"""
+        # Early exit if no decisions or nothing to match against
+        if not self.store.decisions or not current_goal or not current_goal.strip():
+            return []
+        
         similar = []
         current_goal_lower = current_goal.lower()
         
-        # Early exit if no decisions
-        if not self.store.get_all_decisions():
-            return []
+        # Query words (> 3 chars), matched against both goal words and tags
+        current_words = set(w for w in current_goal_lower.split() if len(w) > 3)
+        
+        # Overlap counts come straight from the store's postings lists
+        word_hits, tag_hits = self.store.count_token_matches(current_words)
+        # Decisions whose goal / description / reasoning contain the query,
+        # found in one pass over the store's joined text
+        goal_hits = self.store.goals_containing(current_goal_lower)
+        text_hits = self.store.texts_containing(current_goal_lower)
         
-        for decision in self.store.get_all_decisions():
+        for decision_id, decision in self.store.decisions.items():
             # Score decisions by relevance
             relevance_score = 0
             
             # Full goal match (highest priority)
-            if current_goal_lower in decision.goal.lower() or decision.goal.lower() in current_goal_lower:
+            if decision_id in goal_hits or decision._goal_lower in current_goal_lower:
                 relevance_score += 100
             
+            # Check if description contains relevant keywords
+            if decision_id in text_hits:
+                relevance_score += 50
+            
             # Word overlap in goal (words > 3 chars)
-            current_words = set(w.lower() for w in current_goal_lower.split() if len(w) > 3)
-            decision_words = set(w.lower() for w in decision.goal.lower().split() if len(w) > 3)
-            word_overlap = len(current_words & decision_words)
-            relevance_score += word_overlap * 15
+            relevance_score += word_hits[decision_id] * 15
             
             # Check if situation type matches via tags
-            current_tags = set(w.lower() for w in current_goal_lower.split() if len(w) > 3)
-            decision_tags = set(t.lower() for t in decision.tags)
-            tag_overlap = len(current_tags & decision_tags)
-            relevance_score += tag_overlap * 10
-            
-            # Check if description contains relevant keywords
-            if current_goal_lower in decision.description.lower() or current_goal_lower in decision.reasoning.lower():
-                relevance_score += 50
+            relevance_score += tag_hits[decision_id] * 10
             
             # Only include if relevance score is meaningful (not just random match)
             # Minimum threshold: 10 points (prevents every decision showing up)
@@ -287,7 +627,7 @@ class AIReasoningEngine:
                 })
         
         # Sort by relevance (highest first), then by recency
-        similar.sort(key=lambda x: (-x['relevance'], x['decision'].created_at), reverse=True)
+        similar.sort(key=lambda x: (x['relevance'], x['decision'].created_at), reverse=True)
         return similar[:limit]
     
     def generate_contextual_suggestion(self, current_situation: Dict[str, Any]) -> Dict[str, Any]:
@@ -301,10 +641,12 @@ class AIReasoningEngine:
             'cautions': []
         }
         
-        current_goal = current_situation.get('goal', '')
+        current_goal = current_situation.get('goal') or ''
+        # One sorted snapshot, reused for every count below
+        all_decisions = self.store.get_all_decisions()
         
-        # Find similar past decisions
-        similar = self.find_similar_decisions(current_goal, limit=5)
+        # Find similar past decisions; an empty goal goes straight to general guidance
+        similar = self.find_similar_decisions(current_goal, limit=5) if current_goal.strip() else []
         suggestions['has_similar'] = len(similar) > 0
         
         # Extract past decisions info
@@ -351,7 +693,7 @@ class AIReasoningEngine:
             suggestions['ai_recommendation'] = f"""
 ✅ **Found Similar Past Decisions!**
 
-Based on your {len(self.store.get_all_decisions())} past decisions, your situation is **similar** to decisions you've made before.
+Based on your {len(all_decisions)} past decisions, your situation is **similar** to decisions you've made before.
 
 **Your Pattern:** You've made decisions about {theme_str}. 
 Your approach typically focuses on {most_common_constraint.lower()}.
@@ -369,8 +711,6 @@ Your approach typically focuses on {most_common_constraint.lower()}.
 """
         else:
             # No similar decisions found - provide general guidance
-            all_decisions = self.store.get_all_decisions()
-            
             if len(all_decisions) > 0:
                 suggestions['ai_recommendation'] = f"""
 ℹ️ **No Directly Similar Past Decisions**
@@ -408,15 +748,15 @@ You haven't recorded any decisions yet. To get AI suggestions, start by:
 """
         
         # Generate pattern insights
-        if len(self.store.get_all_decisions()) > 2:
+        if len(all_decisions) > 2:
             suggestions['pattern_insights'] = [
                 "✓ You have enough decision history. Patterns are emerging.",
                 f"✓ You tend to face similar constraints - be proactive about them",
                 f"✓ Link related decisions to understand your evolution"
             ]
-        elif len(self.store.get_all_decisions()) > 0:
+        elif len(all_decisions) > 0:
             suggestions['pattern_insights'] = [
-                f"📝 You have {len(self.store.get_all_decisions())} decision recorded",
+                f"📝 You have {len(all_decisions)} decision recorded",
                 "📝 Record more decisions to unlock pattern analysis",
                 "📝 Document constraints & alternatives for better insights"
             ]
@@ -29,6 +29,13 @@ class LanguageDetector:
         "ar": r"[\u0600-\u06FF]",  # Arabic
     }
     
+    # All patterns as one alternation of named groups, so a single scan
+    # collects the evidence for every language
+    _COMBINED = re.compile(
+        "|".join(f"(?P<{code}>{pattern})" for code, pattern in LANGUAGE_PATTERNS.items()),
+        re.IGNORECASE,
+    )
+    
     @staticmethod
     def detect_language(text: str) -> Optional[str]:
         """
@@ -38,11 +45,12 @@ class LanguageDetector:
         if not text:
             return None
         
-        text_lower = text.lower()
-        
-        for lang_code, pattern in LanguageDetector.LANGUAGE_PATTERNS.items():
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                return lang_code
+        found = {m.lastgroup for m in LanguageDetector._COMBINED.finditer(text)}
+        # Earlier entries in LANGUAGE_PATTERNS win, wherever in the text they
+        # matched (kanji-led Japanese still has kana further on)
+        for code in LanguageDetector.LANGUAGE_PATTERNS:
+            if code in found:
+                return code
         
         return None  # Default to English
 
@@ -54,6 +62,41 @@ class AIDecisionChatbot:
     Supports multilingual interaction.
     """
 
+    BASE_SYSTEM_PROMPT = """You are an intelligent, empathetic Decision Assistant AI. Your role is to help users make better decisions by:
+
+1. **Understanding Context**: Listen carefully to what users are considering and understand their goals, constraints, and concerns.
+
+2. **Providing Insights**: Based on their decision history, help them identify patterns, recurring constraints, and lessons learned from past decisions.
+
+3. **Natural Conversation**: Engage in friendly, natural language conversations. Ask clarifying questions to understand their situation better.
+
+4. **Language Flexibility**: Respond in the user's preferred language or the language they're using to communicate with you. Be culturally sensitive and adapt your communication style.
+
+5. **Actionable Advice**: Provide practical suggestions based on their past experiences and current situation.
+
+6. **Emotional Intelligence**: Recognize when users are facing difficult decisions and be supportive while remaining objective.
+
+7. **Summarization**: When asked, provide concise summaries of decisions and insights.
+
+**Key Capabilities:**
+- Suggest solutions based on past decision patterns
+- Identify recurring constraints and help address them
+- Analyze trade-offs and alternatives
+- Detect risks and opportunities
+- Provide motivation and clarity
+- Support multilingual conversations
+
+**Guidelines:**
+- Be conversational, not robotic
+- Ask follow-up questions to deepen understanding
+- Reference their past decisions when relevant
+- Always respect privacy and decision autonomy
+- Admit when you need more information
+- Prioritize the user's values and preferences
+- Use simple, clear language
+- Be encouraging and supportive
+"""
+
     def __init__(self, groq_api_key: Optional[str] = None):
         """Initialize the chatbot with Groq API"""
         self.api_key = groq_api_key or os.getenv("GROQ_API_KEY")
@@ -63,9 +106,16 @@ class AIDecisionChatbot:
         self.client = Groq(api_key=self.api_key)
         self.model = "llama-3.1-8b-instant"  # Using Llama 3.1 model
         self.chat_history = []
+        self.history_window = 20  # most recent messages sent to the API
         self.user_context = None
         self.conversation_state = None
         self.detected_language = None
+        # Assembled system prompts; reset whenever user_context changes
+        self._cached_system_prompt: Optional[str] = None
+        self._language_prompts: Dict[Optional[str], str] = {}
+        # System prompt + chat_history as last sent to the API
+        self._api_messages: List[Dict] = []
+        self._api_system_prompt: Optional[str] = None
         self.language_names = {
             "es": "Spanish",
             "fr": "French",
@@ -89,50 +139,33 @@ class AIDecisionChatbot:
             "constraints": constraints_summary,
             "updated_at": datetime.now().isoformat(),
         }
+        self._cached_system_prompt = None
+        self._language_prompts = {}
 
     def _build_system_prompt(self) -> str:
         """Build a comprehensive system prompt for the chatbot"""
-        base_prompt = """You are an intelligent, empathetic Decision Assistant AI. Your role is to help users make better decisions by:
-
-1. **Understanding Context**: Listen carefully to what users are considering and understand their goals, constraints, and concerns.
-
-2. **Providing Insights**: Based on their decision history, help them identify patterns, recurring constraints, and lessons learned from past decisions.
-
-3. **Natural Conversation**: Engage in friendly, natural language conversations. Ask clarifying questions to understand their situation better.
-
-4. **Language Flexibility**: Respond in the user's preferred language or the language they're using to communicate with you. Be culturally sensitive and adapt your communication style.
-
-5. **Actionable Advice**: Provide practical suggestions based on their past experiences and current situation.
-
-6. **Emotional Intelligence**: Recognize when users are facing difficult decisions and be supportive while remaining objective.
-
-7. **Summarization**: When asked, provide concise summaries of decisions and insights.
-
-**Key Capabilities:**
-- Suggest solutions based on past decision patterns
-- Identify recurring constraints and help address them
-- Analyze trade-offs and alternatives
-- Detect risks and opportunities
-- Provide motivation and clarity
-- Support multilingual conversations
-
-**Guidelines:**
-- Be conversational, not robotic
-- Ask follow-up questions to deepen understanding
-- Reference their past decisions when relevant
-- Always respect privacy and decision autonomy
-- Admit when you need more information
-- Prioritize the user's values and preferences
-- Use simple, clear language
-- Be encouraging and supportive
-"""
+        if self._cached_system_prompt is not None:
+            return self._cached_system_prompt
+        
+        base_prompt = self.BASE_SYSTEM_PROMPT
 
         if self.user_context:
             base_prompt += f"\n\n**User's Decision Context:**\n{self.user_context['decisions']}"
             base_prompt += f"\n\n**Common Constraints:**\n{self.user_context['constraints']}"
 
+        self._cached_system_prompt = base_prompt
         return base_prompt
 
+    def _system_prompt_for_language(self, language: Optional[str]) -> str:
+        """System prompt plus the respond-in-language instruction, cached per language"""
+        if language not in self._language_prompts:
+            system_prompt = self._build_system_prompt()
+            if language:
+                lang_name = self.language_names.get(language, "the user's language")
+                system_prompt += f"\n\nIMPORTANT: The user is communicating in {lang_name}. Please respond entirely in {lang_name}."
+            self._language_prompts[language] = system_prompt
+        return self._language_prompts[language]
+
     def chat(self, user_message: str) -> str:
         """
         Send a message to the chatbot and get a response.
@@ -146,30 +179,26 @@ class AIDecisionChatbot:
                 self.detected_language = detected
             
             # Add user message to history
-            self.chat_history.append({"role": "user", "content": user_message})
-
-            # Build the system prompt
-            system_prompt = self._build_system_prompt()
-            
-            # Add language instruction if non-English detected
-            if self.detected_language:
-                lang_name = self.language_names.get(self.detected_language, "the user's language")
-                system_prompt += f"\n\nIMPORTANT: The user is communicating in {lang_name}. Please respond entirely in {lang_name}."
-
-            # Build messages for Groq API
-            messages = [{"role": "user", "content": system_prompt}]
-            
-            # Add conversation history
-            for msg in self.chat_history[:-1]:  # All except the current message
-                messages.append(msg)
-            
-            # Add current user message
-            messages.append({"role": "user", "content": user_message})
+            user_entry = {"role": "user", "content": user_message}
+            self.chat_history.append(user_entry)
+
+            # Build the system prompt, with a language instruction if non-English detected
+            system_prompt = self._system_prompt_for_language(self.detected_language)
+
+            # Messages for Groq API: extend the running list, rebuild only
+            # when the system prompt in front of it has changed
+            if system_prompt != self._api_system_prompt:
+                self._api_messages = [{"role": "system", "content": system_prompt}]
+                self._api_messages.extend(self.chat_history[-self.history_window:])
+                self._api_system_prompt = system_prompt
+            else:
+                self._api_messages.append(user_entry)
+                self._trim_api_messages()
 
             # Call Groq API
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=messages,
+                messages=self._api_messages,
                 max_tokens=1024,
                 temperature=0.7
             )
@@ -177,7 +206,10 @@ class AIDecisionChatbot:
             assistant_response = response.choices[0].message.content
 
             # Add assistant response to history
-            self.chat_history.append({"role": "assistant", "content": assistant_response})
+            assistant_entry = {"role": "assistant", "content": assistant_response}
+            self.chat_history.append(assistant_entry)
+            self._api_messages.append(assistant_entry)
+            self._trim_api_messages()
 
             return assistant_response
 
@@ -185,6 +217,12 @@ class AIDecisionChatbot:
             error_msg = f"I encountered an error: {str(e)}"
             return error_msg
 
+    def _trim_api_messages(self):
+        """Keep the system prompt plus only the last history_window messages"""
+        excess = len(self._api_messages) - 1 - self.history_window
+        if excess > 0:
+            del self._api_messages[1:1 + excess]
+
     def get_decision_insight(
         self, decision_title: str, goal: str, situation: str, constraints: str = ""
     ) -> str:
@@ -264,6 +302,7 @@ Be encouraging but honest."""
         """Clear the conversation history"""
         self.chat_history = []
         self.detected_language = None
+        self._api_system_prompt = None
 
     def get_conversation_history(self) -> List[Dict]:
         """Return the full conversation history"""
@@ -272,6 +311,7 @@ Be encouraging but honest."""
     def set_conversation_history(self, history: List[Dict]):
         """Set the conversation history (for loading from session state)"""
         self.chat_history = history
+        self._api_system_prompt = None
 
     def create_summary(self) -> str:
         """Create a summary of the conversation for reference"""
@@ -703,24 +703,23 @@ def render_record_decision_page(user_id: int, user_name: str):
                     
                     # Save chat history linked to decision
                     chat_saved_count = 0
-                    if len(st.session_state.decision_chat) > 0:
-                        for i, msg in enumerate(st.session_state.decision_chat):
-                            # Pair user messages with AI responses
-                            if msg.get('role') == 'user' and i + 1 < len(st.session_state.decision_chat):
-                                next_msg = st.session_state.decision_chat[i + 1]
-                                if next_msg.get('role') == 'assistant':
-                                    try:
-                                        db.save_chat_message(
-                                            user_id,
-                                            msg.get('content', ''),
-                                            next_msg.get('content', ''),
-                                            chat_type="decision_recording",
-                                            decision_id=decision_id
-                                        )
-                                        chat_saved_count += 1
-                                    except Exception as chat_err:
-                                        st.warning(f"⚠️ Could not save some chat messages: {str(chat_err)}")
-                                        # Continue saving other messages
+                    exchanges = []
+                    for i, msg in enumerate(st.session_state.decision_chat):
+                        # Pair user messages with AI responses
+                        if msg.get('role') == 'user' and i + 1 < len(st.session_state.decision_chat):
+                            next_msg = st.session_state.decision_chat[i + 1]
+                            if next_msg.get('role') == 'assistant':
+                                exchanges.append((msg.get('content', ''), next_msg.get('content', '')))
+                    if exchanges:
+                        try:
+                            chat_saved_count = len(db.save_chat_messages(
+                                user_id,
+                                exchanges,
+                                chat_type="decision_recording",
+                                decision_id=decision_id
+                            ))
+                        except Exception as chat_err:
+                            st.warning(f"⚠️ Could not save chat messages: {str(chat_err)}")
                     
                     # Show success message
                     st.success(f"✅ Decision saved successfully! 🎉 ({chat_saved_count} chat exchanges saved)")
@@ -912,23 +911,23 @@ def render_record_decision_page(user_id: int, user_name: str):
                     
                     # Save chat history linked to decision
                     chat_saved_count = 0
-                    if len(st.session_state.decision_chat) > 0:
-                        for i, msg in enumerate(st.session_state.decision_chat):
-                            # Pair user messages with AI responses
-                            if msg.get('role') == 'user' and i + 1 < len(st.session_state.decision_chat):
-                                next_msg = st.session_state.decision_chat[i + 1]
-                                if next_msg.get('role') == 'assistant':
-                                    try:
-                                        db.save_chat_message(
-                                            user_id,
-                                            msg.get('content', ''),
-                                            next_msg.get('content', ''),
-                                            chat_type="decision_recording",
-                                            decision_id=decision_id
-                                        )
-                                        chat_saved_count += 1
-                                    except Exception as chat_err:
-                                        st.warning(f"⚠️ Could not save some chat messages: {str(chat_err)}")
+                    exchanges = []
+                    for i, msg in enumerate(st.session_state.decision_chat):
+                        # Pair user messages with AI responses
+                        if msg.get('role') == 'user' and i + 1 < len(st.session_state.decision_chat):
+                            next_msg = st.session_state.decision_chat[i + 1]
+                            if next_msg.get('role') == 'assistant':
+                                exchanges.append((msg.get('content', ''), next_msg.get('content', '')))
+                    if exchanges:
+                        try:
+                            chat_saved_count = len(db.save_chat_messages(
+                                user_id,
+                                exchanges,
+                                chat_type="decision_recording",
+                                decision_id=decision_id
+                            ))
+                        except Exception as chat_err:
+                            st.warning(f"⚠️ Could not save chat messages: {str(chat_err)}")
                     
                     # Show success message
                     st.success(f"✅ Decision saved successfully! 🎉 ({chat_saved_count} chat exchanges saved)")
@@ -1032,18 +1031,19 @@ def render_record_decision_page(user_id: int, user_name: str):
                 decision_id = db.save_decision(user_id, decision_data)
                 
                 # Save chat history linked to decision
+                exchanges = []
                 for msg in st.session_state.decision_chat[1:]:  # Skip opening message
                     if msg['role'] == 'user':
                         idx = st.session_state.decision_chat.index(msg)
                         if idx + 1 < len(st.session_state.decision_chat):
                             ai_msg = st.session_state.decision_chat[idx + 1]
-                            db.save_chat_message(
-                                user_id,
-                                msg['content'],
-                                ai_msg['content'],
-                                chat_type="decision_recording",
-                                decision_id=decision_id
-                            )
+                            exchanges.append((msg['content'], ai_msg['content']))
+                db.save_chat_messages(
+                    user_id,
+                    exchanges,
+                    chat_type="decision_recording",
+                    decision_id=decision_id
+                )
                 
                 # Animated success state
                 col_anim, col_msg = st.columns([1, 2])
@@ -1285,11 +1285,10 @@ def render_suggestions_page(user_id: int, user_name: str):
         with st.chat_message("user"):
             st.write(user_input)
         
-        with st.spinner("Analyzing your decisions..."):
-            response = engine.get_suggestion_response(user_input, decisions[-1] if decisions else None)
-        
         with st.chat_message("assistant"):
-            st.write(response)
+            response = st.write_stream(
+                engine.stream_suggestion_response(user_input, decisions[-1] if decisions else None)
+            )
         
         st.session_state.suggestion_chat.append({"role": "user", "content": user_input})
         st.session_state.suggestion_chat.append({"role": "assistant", "content": response})
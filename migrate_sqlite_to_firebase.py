@@ -1,8 +1,15 @@
 # migrate_sqlite_to_firestore.py
-import sqlite3, os
+import sqlite3, os, json
 from database import FirestoreDatabaseManager
 
 path = "decision_system.db"
+
+# Fixed statement texts so sqlite3's statement cache reuses the compiled
+# program instead of reparsing on every execute.
+_SELECT_USERS = "SELECT * FROM users"
+_SELECT_PREFS = "SELECT * FROM user_preferences WHERE user_id = ?"
+_SELECT_DECISIONS = "SELECT * FROM decisions"
+_SELECT_CHAT = "SELECT * FROM chat_history"
 if not os.path.exists(path):
     raise SystemExit("No SQLite DB found.")
 
@@ -12,12 +19,18 @@ if not cred:
 
 db = FirestoreDatabaseManager(cred)
 
-conn = sqlite3.connect(path)
+conn = sqlite3.connect(path, cached_statements=256)
 conn.row_factory = sqlite3.Row
+# Read-only bulk scan: keep temp b-trees in RAM, use a 64MB page cache and
+# memory-map the file so the per-user preference lookups don't hit disk.
+conn.execute("PRAGMA query_only=ON")
+conn.execute("PRAGMA temp_store=MEMORY")
+conn.execute("PRAGMA cache_size=-64000")
+conn.execute("PRAGMA mmap_size=268435456")
 cur = conn.cursor()
 
 # Users
-for row in cur.execute("SELECT * FROM users"):
+for row in cur.execute(_SELECT_USERS):
     uid = str(row["id"])
     user_doc = {
         "email": row["email"],
@@ -26,17 +39,21 @@ for row in cur.execute("SELECT * FROM users"):
         "created_at": row["created_at"]
     }
     db.users.document(uid).set(user_doc)
-    pref = cur.execute("SELECT * FROM user_preferences WHERE user_id = ?", (row["id"],)).fetchone()
+    pref = conn.execute(_SELECT_PREFS, (row["id"],)).fetchone()
     if pref:
         db.prefs.document(uid).set({"user_id": uid, "share_data_with_ai": bool(pref["share_data_with_ai"]), "view_chat_history": bool(pref["view_chat_history"])})
 
 # Decisions
-for row in cur.execute("SELECT * FROM decisions"):
+for row in cur.execute(_SELECT_DECISIONS):
     doc = dict(row)
+    # SQLite kept these as JSON text; store them as native Firestore arrays
+    for key in ("constraints", "alternatives", "tags"):
+        if isinstance(doc.get(key), str):
+            doc[key] = json.loads(doc[key]) if doc[key] else []
     db.decisions.document(doc["id"]).set(doc)
 
 # Chat history
-for row in cur.execute("SELECT * FROM chat_history"):
+for row in cur.execute(_SELECT_CHAT):
     doc = dict(row)
     db.chat.document().set(doc)
 
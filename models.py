@@ -0,0 +1,27 @@
+"""
+Shared Models
+Lazily loaded embedding model and tokenizer, one instance per process
+"""
+
+from functools import cache
+from importlib.util import find_spec
+
+# Both are optional; callers check the *_AVAILABLE flags before use. Only the
+# packages' presence is checked here: sentence-transformers pulls in torch, so
+# the imports wait until the first embedder()/tokenizer() call
+EMBEDDINGS_AVAILABLE = find_spec('numpy') is not None and find_spec('sentence_transformers') is not None
+TOKENIZER_AVAILABLE = find_spec('tiktoken') is not None
+
+
+@cache
+def embedder():
+    """Sentence embedding model shared by the semantic cache and review ranking"""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer('all-MiniLM-L6-v2')
+
+
+@cache
+def tokenizer():
+    """cl100k_base encoding used for token budgets"""
+    import tiktoken
+    return tiktoken.get_encoding('cl100k_base')
@@ -3,15 +3,80 @@ AI Suggestions Engine
 Provides intelligent suggestions based on past decisions through conversational interface
 """
 
-from groq import Groq
-from typing import Dict, List, Optional
+from groq import Groq, AsyncGroq, RateLimitError, APIConnectionError
+from typing import Dict, Iterator, List, Optional, Tuple
 import os
 from dotenv import load_dotenv
+import io
 import json
+import re
+from context_budget import (
+    DECISION_CONTEXT_TOKENS, KEEP_RECENT_MESSAGES, REVIEW_SUMMARY_TOKENS,
+    compact_history, count_tokens, fit_tokens,
+)
+import time
+import random
+import asyncio
+import threading
+from datetime import datetime
+from collections import deque
+import atexit
+import httpx
+from contextlib import asynccontextmanager
+from functools import cache, lru_cache
 
-load_dotenv()
-GROQ_API_KEY = os.getenv('GROQ_API_KEY')
-client = Groq(api_key=GROQ_API_KEY)
+from models import EMBEDDINGS_AVAILABLE, embedder
+
+# Without sentence-transformers the semantic cache and review ranking are skipped
+if EMBEDDINGS_AVAILABLE:
+    import numpy as np
+
+# HTTP/2 needs the h2 package; without it httpx stays on HTTP/1.1 keep-alive
+try:
+    import h2  # noqa: F401
+    _h2_imported = True
+except ImportError:
+    _h2_imported = False
+
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+_HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+
+@cache
+def _load_env():
+    """Read .env once, on first use rather than at import"""
+    load_dotenv()
+
+
+@cache
+def _client() -> Groq:
+    """Process-wide Groq client; one pooled connection set so calls reuse TCP/TLS sessions"""
+    _load_env()
+    http_client = httpx.Client(http2=_h2_imported, limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT)
+    atexit.register(http_client.close)
+    # Retries are handled once, in _create; stop the SDK retrying underneath it
+    return Groq(api_key=os.getenv('GROQ_API_KEY'), http_client=http_client, max_retries=0)
+
+
+@asynccontextmanager
+async def _async_client():
+    """
+    AsyncGroq over one pooled httpx.AsyncClient for the duration of the block.
+    Async connections are bound to the loop that opened them, so the pool
+    lives per batch and is closed when the batch ends.
+    """
+    _load_env()
+    async with httpx.AsyncClient(http2=_h2_imported, limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT) as http_client:
+        # Retries are handled once, in _acreate
+        yield AsyncGroq(api_key=os.getenv('GROQ_API_KEY'), http_client=http_client, max_retries=0)
+
+
+# Replies that count as suggestions; one case-insensitive scan, no lowercased copy
+_SUGGESTION_RE = re.compile(r'suggest|consider|option|alternative', re.IGNORECASE)
+
+ANALYSIS_CONCURRENCY = 8  # in-flight requests per batch, stays under the RPM limit
+API_RETRIES = 3
+_RETRYABLE_ERRORS = (RateLimitError, APIConnectionError)
 
 
 def get_available_model():
@@ -20,6 +85,141 @@ def get_available_model():
     return 'llama-3.1-8b-instant'
 
 
+# Short opening turns go to the small model; analyses and longer turns to the big one.
+# Both default to the 8B model, so routing only changes cost once
+# NEUROLINKER_MODEL_SMALL names something cheaper
+SMALL_TURN_TOKENS = 60
+SMALL_TURN_HISTORY = 4
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Server's retry-after when given, else jittered exponential backoff capped at 8s"""
+    response = getattr(error, 'response', None)
+    if response is not None:
+        try:
+            return float(response.headers.get('retry-after'))
+        except (TypeError, ValueError):
+            pass
+    return min(8.0, 2 ** attempt) + random.uniform(0, 1)
+
+
+def _create(**kwargs):
+    """Chat completion, retried on rate limits and dropped connections"""
+    for attempt in range(API_RETRIES):
+        try:
+            return _client().chat.completions.create(**kwargs)
+        except _RETRYABLE_ERRORS as e:
+            if attempt == API_RETRIES - 1:
+                raise
+            time.sleep(_retry_delay(e, attempt))
+
+
+async def _acreate(aclient: AsyncGroq, **kwargs):
+    """Async counterpart of _create"""
+    for attempt in range(API_RETRIES):
+        try:
+            return await aclient.chat.completions.create(**kwargs)
+        except _RETRYABLE_ERRORS as e:
+            if attempt == API_RETRIES - 1:
+                raise
+            await asyncio.sleep(_retry_delay(e, attempt))
+
+
+@lru_cache(maxsize=512)
+def _cached_completion(model: str, messages: Tuple[Tuple[str, str], ...], max_tokens: int, temperature: float) -> str:
+    """Completion text for an exact (model, messages, params) repeat; errors are not cached"""
+    response = _create(
+        model=model,
+        messages=[{"role": role, "content": content} for role, content in messages],
+        max_tokens=max_tokens,
+        temperature=temperature,
+    )
+    return response.choices[0].message.content
+
+
+def _stream_deltas(stream) -> Iterator[str]:
+    for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            yield delta
+
+
+def _complete(model: str, messages: List[Dict], *, max_tokens: int, temperature: float,
+              cache: bool = False, stream: bool = False):
+    """
+    Single entry point for Groq completions. Returns the reply text, or an
+    iterator of text deltas when stream=True; cache=True serves exact repeats
+    from _cached_completion.
+    """
+    if stream:
+        return _stream_deltas(_create(
+            model=model, messages=messages, max_tokens=max_tokens, temperature=temperature, stream=True,
+        ))
+    if cache:
+        return _cached_completion(model, tuple((m['role'], m['content']) for m in messages), max_tokens, temperature)
+    return _create(model=model, messages=messages, max_tokens=max_tokens, temperature=temperature).choices[0].message.content
+
+
+SEMANTIC_CACHE_THRESHOLD = 0.92  # cosine similarity
+SEMANTIC_CACHE_TTL = 3600  # seconds
+SEMANTIC_CACHE_SIZE = 1000
+REVIEW_TOP_K = 3  # decisions sent per review query when embeddings are available
+HISTORY_MAXLEN = 32  # messages kept per assistant; older ones are dropped
+SEMANTIC_SCOPE_TURNS = 4  # prior messages that must match for a semantic cache hit
+
+class _SemanticCache:
+    """Replies to paraphrased questions, matched by normalized embedding within a scope"""
+    
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 ttl: float = SEMANTIC_CACHE_TTL, max_entries: int = SEMANTIC_CACHE_SIZE):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._matrix = None  # one embedding per row, oldest first
+        self._entries: List[Tuple[int, str, float]] = []  # (scope, response, ts)
+        # Shared by every Streamlit session thread; _matrix and _entries must
+        # change together
+        self._lock = threading.Lock()
+    
+    def _drop_oldest(self, count: int):
+        # caller holds self._lock
+        self._entries = self._entries[count:]
+        self._matrix = self._matrix[count:] if self._entries else None
+    
+    def get(self, scope: int, embedding) -> Optional[str]:
+        with self._lock:
+            if self._matrix is None:
+                return None
+            # Entries are in insertion order, so expired ones sit at the front
+            cutoff = time.time() - self.ttl
+            expired = 0
+            while expired < len(self._entries) and self._entries[expired][2] < cutoff:
+                expired += 1
+            if expired:
+                self._drop_oldest(expired)
+                if self._matrix is None:
+                    return None
+            
+            scores = self._matrix @ embedding
+            for i in np.argsort(-scores):
+                if scores[i] < self.threshold:
+                    break
+                if self._entries[i][0] == scope:
+                    return self._entries[i][1]
+            return None
+    
+    def put(self, scope: int, embedding, response: str):
+        row = embedding.reshape(1, -1)
+        with self._lock:
+            self._matrix = row if self._matrix is None else np.vstack([self._matrix, row])
+            self._entries.append((scope, response, time.time()))
+            if len(self._entries) > self.max_entries:
+                self._drop_oldest(len(self._entries) - self.max_entries)
+
+
+_semantic_cache = _SemanticCache() if EMBEDDINGS_AVAILABLE else None
+
+
 class SuggestionEngine:
     """AI-powered suggestion system for improving decisions"""
     
@@ -47,17 +247,31 @@ Remember: The user owns the decisions. You're here to help them think better, no
     
     def __init__(self, past_decisions: List[Dict] = None):
         self.past_decisions = past_decisions or []
-        self.conversation_history = []
-        self.model = get_available_model()
+        self.conversation_history = deque(maxlen=HISTORY_MAXLEN)
+        # Summary of turns compacted out of conversation_history, kept apart
+        # so the deque bound never evicts it
+        self._history_summary: Optional[Dict] = None
+        _load_env()
+        self.model_big = os.getenv('NEUROLINKER_MODEL_BIG', get_available_model())
+        self.model_small = os.getenv('NEUROLINKER_MODEL_SMALL', self.model_big)
         self.suggestions_made = []
+        # NEUROLINKER_DETERMINISTIC=1 samples suggestions at temperature 0 and
+        # serves repeated or paraphrased questions from the reply caches
+        self.deterministic = os.getenv('NEUROLINKER_DETERMINISTIC', '0') == '1'
+        # Rendered decision context, reused until the decisions change
+        self._decisions_version = 0
+        self._ctx_cache: Dict[tuple, str] = {}
     
     def set_past_decisions(self, decisions: List[Dict]):
         """Set the user's past decisions for context"""
         self.past_decisions = decisions
+        self._decisions_version += 1
+        self._ctx_cache = {}
     
     def start_suggestion_session(self, current_decision: Dict = None) -> str:
         """Start a suggestion session"""
-        self.conversation_history = []
+        self.conversation_history = deque(maxlen=HISTORY_MAXLEN)
+        self._history_summary = None
         self.suggestions_made = []
         
         opening = "🚀 **AI Decision Suggestions**\n\n"
@@ -80,7 +294,63 @@ Remember: The user owns the decisions. You're here to help them think better, no
     
     def get_suggestion_response(self, user_input: str, current_decision: Dict = None) -> str:
         """Get AI suggestion based on conversation and past decisions"""
+        try:
+            messages = self._suggestion_messages(user_input, current_decision)
+            cache_key, ai_response = self._semantic_lookup(user_input, current_decision)
+            
+            if ai_response is None:
+                ai_response = _complete(
+                    self._suggestion_model(user_input), messages,
+                    max_tokens=600, temperature=self._suggestion_temperature(),
+                    cache=self.deterministic,
+                ).strip()
+                
+                if cache_key is not None:
+                    _semantic_cache.put(*cache_key, ai_response)
+            
+            self._record_suggestion(user_input, ai_response)
+            return ai_response
         
+        except Exception as e:
+            return f"I encountered an issue: {str(e)}. Let me try to help you another way."
+    
+    def stream_suggestion_response(self, user_input: str, current_decision: Dict = None) -> Iterator[str]:
+        """Like get_suggestion_response, but yields the reply as tokens arrive"""
+        try:
+            messages = self._suggestion_messages(user_input, current_decision)
+            cache_key, ai_response = self._semantic_lookup(user_input, current_decision)
+            if ai_response is not None:
+                self._record_suggestion(user_input, ai_response)
+                yield ai_response
+                return
+            
+            parts = []
+            model = self._suggestion_model(user_input)
+            for delta in _complete(model, messages, max_tokens=600,
+                                   temperature=self._suggestion_temperature(), stream=True):
+                parts.append(delta)
+                yield delta
+            
+            ai_response = ''.join(parts).strip()
+            if cache_key is not None:
+                _semantic_cache.put(*cache_key, ai_response)
+            self._record_suggestion(user_input, ai_response)
+        
+        except Exception as e:
+            yield f"I encountered an issue: {str(e)}. Let me try to help you another way."
+    
+    def _suggestion_temperature(self) -> float:
+        return 0.0 if self.deterministic else 0.8
+    
+    def _suggestion_model(self, user_input: str) -> str:
+        """Small model for short early turns, big model otherwise"""
+        if (len(self.conversation_history) < SMALL_TURN_HISTORY
+                and count_tokens(user_input) < SMALL_TURN_TOKENS):
+            return self.model_small
+        return self.model_big
+    
+    def _suggestion_messages(self, user_input: str, current_decision: Dict = None) -> List[Dict]:
+        """Record the user turn and build the messages for the API"""
         self.conversation_history.append({
             'role': 'user',
             'content': user_input
@@ -89,94 +359,147 @@ Remember: The user owns the decisions. You're here to help them think better, no
         # Build context with past decisions
         context = self._build_decision_context(current_decision)
         
-        # Build the prompt
-        prompt = self.SUGGESTION_SYSTEM_PROMPT
-        
+        # Static instructions first and the per-user context as its own
+        # message, so every request starts with the same prefix
+        messages = [{"role": "system", "content": self.SUGGESTION_SYSTEM_PROMPT}]
         if context:
-            prompt += f"\n\n**User's Decision Context:**\n{context}"
+            messages.append({"role": "system", "content": f"**User's Decision Context:**\n{context}"})
         
-        # Add recent conversation history
-        messages = [{"role": "user", "content": prompt}]
+        # Older turns (and any earlier summary) collapse into a summary once
+        # the prompt nears the token budget
+        history = list(self.conversation_history)
+        if self._history_summary is not None:
+            history.insert(0, self._history_summary)
+        try:
+            history = compact_history(
+                history,
+                self._summarize,
+                reserved_tokens=sum(count_tokens(m['content']) for m in messages),
+            )
+            if history and history[0].get('is_summary'):
+                self._history_summary = history[0]
+                self.conversation_history = deque(history[1:], maxlen=HISTORY_MAXLEN)
+        except Exception:
+            # Summary call failed: send the summary so far plus the recent
+            # turns this time, keep the stored history and retry next turn
+            recent = history[-KEEP_RECENT_MESSAGES:]
+            if self._history_summary is not None and recent[0] is not self._history_summary:
+                recent.insert(0, self._history_summary)
+            history = recent
         
-        # Add last few messages to keep conversation flowing
-        for msg in self.conversation_history[-6:]:
-            if msg['role'] == 'user':
-                messages.append({"role": "user", "content": msg['content']})
+        for msg in history:
+            if msg['role'] in ('user', 'system'):
+                messages.append({"role": msg['role'], "content": msg['content']})
             else:
                 messages.append({"role": "assistant", "content": msg['content']})
         
-        try:
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=600,
-                temperature=0.8,
-            )
-            
-            ai_response = response.choices[0].message.content.strip()
-            
-            # Add to conversation history
-            self.conversation_history.append({
-                'role': 'assistant',
-                'content': ai_response
-            })
-            
-            # Track suggestions made
-            if any(word in ai_response.lower() for word in ['suggest', 'consider', 'option', 'alternative']):
-                self.suggestions_made.append({
-                    'input': user_input,
-                    'suggestion': ai_response
-                })
-            
-            return ai_response
+        return messages
+    
+    def _summarize(self, prompt: str) -> str:
+        """Condense older conversation turns for compact_history"""
+        return _complete(
+            self.model_small, [{"role": "user", "content": prompt}], max_tokens=400, temperature=0.3,
+        ).strip()
+    
+    def _semantic_lookup(self, user_input: str, current_decision: Dict = None):
+        """Return (cache key, cached reply or None); the key is None when the cache is off"""
+        # Only deterministic replies are worth reusing; same opt-in as the
+        # exact-match cache
+        if _semantic_cache is None or not self.deterministic:
+            return None, None
+        # Scoped to this user's decisions, current decision and the recent
+        # conversation so replies never cross between users, contexts or
+        # points in a chat
+        scope = self._semantic_scope(current_decision)
+        query_embedding = embedder().encode(user_input, normalize_embeddings=True)
+        return (scope, query_embedding), _semantic_cache.get(scope, query_embedding)
+    
+    def _record_suggestion(self, user_input: str, ai_response: str):
+        """Add the reply to conversation history and track suggestions made"""
+        self.conversation_history.append({
+            'role': 'assistant',
+            'content': ai_response
+        })
         
-        except Exception as e:
-            return f"I encountered an issue: {str(e)}. Let me try to help you another way."
+        if _SUGGESTION_RE.search(ai_response):
+            self.suggestions_made.append({
+                'input': user_input,
+                'suggestion': ai_response
+            })
+    
+    def _semantic_scope(self, current_decision: Dict = None) -> int:
+        """Fingerprint of the decisions and recent turns a cached reply was generated against"""
+        # History already ends with the current user turn; the turns before it
+        # are what a follow-up like "tell me more" refers to
+        history = list(self.conversation_history)[:-1]
+        recent_turns = tuple((m['role'], m['content']) for m in history[-SEMANTIC_SCOPE_TURNS:])
+        return hash((
+            json.dumps(self.past_decisions, sort_keys=True, default=str),
+            json.dumps(current_decision, sort_keys=True, default=str),
+            self._history_summary['content'] if self._history_summary else None,
+            recent_turns,
+        ))
     
     def _build_decision_context(self, current_decision: Dict = None) -> str:
         """Build context from past decisions and current decision"""
-        context_parts = []
+        key = (id(self.past_decisions), len(self.past_decisions), self._decisions_version, repr(current_decision))
+        context = self._ctx_cache.get(key)
+        if context is None:
+            context = self._ctx_cache[key] = self._render_decision_context(current_decision)
+        return context
+    
+    def _render_decision_context(self, current_decision: Dict = None) -> str:
+        buf = io.StringIO()
+        write = buf.write
         
         if current_decision:
-            context_parts.append("**Current Decision Being Considered:**")
+            write("**Current Decision Being Considered:**\n")
             if current_decision.get('description'):
-                context_parts.append(f"- What: {current_decision['description']}")
+                write(f"- What: {current_decision['description']}\n")
             if current_decision.get('goal'):
-                context_parts.append(f"- Goal: {current_decision['goal']}")
+                write(f"- Goal: {current_decision['goal']}\n")
             if current_decision.get('constraints'):
                 constraints = ', '.join(current_decision['constraints']) if isinstance(current_decision['constraints'], list) else str(current_decision['constraints'])
-                context_parts.append(f"- Constraints: {constraints}")
-            context_parts.append("")
+                write(f"- Constraints: {constraints}\n")
+            write("\n")
         
         if self.past_decisions:
-            context_parts.append("**Past Decisions for Reference:**")
+            write("**Past Decisions for Reference:**\n")
             
-            # Show last 3 decisions with key details
-            for i, decision in enumerate(self.past_decisions[-3:], 1):
-                context_parts.append(f"\nDecision {i}: {decision.get('title', 'Untitled')}")
+            # Show last 3 decisions with key details; description and
+            # reasoning share what's left of the token budget
+            recent = self.past_decisions[-3:]
+            remaining = DECISION_CONTEXT_TOKENS - count_tokens(buf.getvalue())
+            field_budget = max(50, remaining // len(recent)) // 2
+            for i, decision in enumerate(recent, 1):
+                write(f"\nDecision {i}: {decision.get('title', 'Untitled')}\n")
                 if decision.get('description'):
-                    context_parts.append(f"  - Description: {decision['description'][:100]}...")
+                    write(f"  - Description: {fit_tokens(decision['description'], field_budget)}\n")
                 if decision.get('final_choice'):
-                    context_parts.append(f"  - Choice: {decision['final_choice']}")
+                    write(f"  - Choice: {decision['final_choice']}\n")
                 if decision.get('reasoning'):
-                    context_parts.append(f"  - Reasoning: {decision['reasoning'][:100]}...")
+                    write(f"  - Reasoning: {fit_tokens(decision['reasoning'], field_budget)}\n")
                 if decision.get('outcome_status'):
-                    context_parts.append(f"  - Status: {decision['outcome_status']}")
+                    write(f"  - Status: {decision['outcome_status']}\n")
         
-        return '\n'.join(context_parts) if context_parts else ""
+        return buf.getvalue().rstrip('\n')
     
-    def get_decision_analysis(self, decision: Dict) -> str:
-        """Get detailed analysis of a single decision"""
-        analysis_prompt = f"""Analyze this decision and provide insights:
-
-Title: {decision.get('title', 'Untitled')}
+    def _decision_details(self, decision: Dict) -> str:
+        """Decision fields as shown to the model in analysis prompts"""
+        return f"""Title: {decision.get('title', 'Untitled')}
 Description: {decision.get('description', '')}
 Goal: {decision.get('goal', '')}
 Constraints: {', '.join(decision.get('constraints', [])) if isinstance(decision.get('constraints'), list) else decision.get('constraints', '')}
 Alternatives: {', '.join(decision.get('alternatives', [])) if isinstance(decision.get('alternatives'), list) else decision.get('alternatives', '')}
 Final Choice: {decision.get('final_choice', '')}
 Reasoning: {decision.get('reasoning', '')}
-Outcome Status: {decision.get('outcome_status', '')}
+Outcome Status: {decision.get('outcome_status', '')}"""
+    
+    def _analysis_prompt(self, decision: Dict) -> str:
+        """Prompt for a single decision analysis"""
+        return f"""Analyze this decision and provide insights:
+
+{self._decision_details(decision)}
 
 Provide:
 1. Strengths of this decision
@@ -186,11 +509,81 @@ Provide:
 5. Lessons learned
 
 Be constructive and supportive."""
+    
+    def get_decision_analysis(self, decision: Dict) -> str:
+        """Get detailed analysis of a single decision"""
+        analysis_prompt = self._analysis_prompt(decision)
         
         try:
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": analysis_prompt}],
+            return _complete(
+                self.model_big, [{"role": "user", "content": analysis_prompt}],
+                max_tokens=800, temperature=0.7, cache=True,
+            )
+        except Exception as e:
+            return f"I couldn't analyze that decision: {str(e)}"
+    
+    def batch_analyze(self, decisions: List[Dict], k: int = 5) -> List[str]:
+        """Analyze decisions k per request, one analysis string per decision"""
+        analyses = []
+        for start in range(0, len(decisions), k):
+            group = decisions[start:start + k]
+            blocks = '\n\n'.join(
+                f"### Decision {i}\n{self._decision_details(d)}" for i, d in enumerate(group, 1)
+            )
+            batch_prompt = f"""Analyze each of the following {len(group)} decisions.
+
+{blocks}
+
+Return a JSON array of {len(group)} objects, one per decision in the same order, with keys:
+"strengths", "weaknesses", "process", "improvements", "lessons".
+"process" is what was done well in the decision process; "lessons" are lessons learned.
+Be constructive and supportive. Return only the JSON array."""
+            
+            try:
+                raw = _complete(
+                    self.model_big, [{"role": "user", "content": batch_prompt}],
+                    max_tokens=800 * len(group), temperature=0.4, cache=True,
+                )
+                items = json.loads(raw[raw.index('['):raw.rindex(']') + 1])
+                if (not isinstance(items, list) or len(items) != len(group)
+                        or not all(isinstance(item, dict) for item in items)):
+                    raise ValueError("unexpected batch analysis shape")
+                # format the whole group before adding any of it
+                formatted = [self._format_analysis(item) for item in items]
+                analyses.extend(formatted)
+            except Exception:
+                # Malformed or failed batch: analyze this group one by one
+                analyses.extend(self.get_decision_analysis(d) for d in group)
+        return analyses
+    
+    def _format_analysis(self, item: Dict) -> str:
+        """Render one batch_analyze JSON object as markdown"""
+        sections = (
+            ('strengths', 'Strengths'),
+            ('weaknesses', 'Potential weaknesses or risks'),
+            ('process', 'What was done well'),
+            ('improvements', 'Areas for improvement'),
+            ('lessons', 'Lessons learned'),
+        )
+        parts = []
+        for key, heading in sections:
+            value = item.get(key)
+            if isinstance(value, list):
+                value = '\n'.join(f"- {v}" for v in value)
+            if value:
+                parts.append(f"**{heading}:**\n{value}")
+        return '\n\n'.join(parts)
+    
+    async def aget_decision_analysis(self, decision: Dict, aclient: Optional[AsyncGroq] = None) -> str:
+        """Async variant of get_decision_analysis; opens its own client unless one is passed"""
+        if aclient is None:
+            async with _async_client() as aclient:
+                return await self.aget_decision_analysis(decision, aclient)
+        try:
+            response = await _acreate(
+                aclient,
+                model=self.model_big,
+                messages=[{"role": "user", "content": self._analysis_prompt(decision)}],
                 max_tokens=800,
                 temperature=0.7,
             )
@@ -198,6 +591,22 @@ Be constructive and supportive."""
         except Exception as e:
             return f"I couldn't analyze that decision: {str(e)}"
     
+    async def aanalyze_many(self, decisions: List[Dict]) -> List[str]:
+        """Analyze several decisions concurrently, results in input order"""
+        semaphore = asyncio.Semaphore(ANALYSIS_CONCURRENCY)
+        
+        # One connection pool shared by the whole batch, closed when it ends
+        async with _async_client() as aclient:
+            async def analyze(decision: Dict) -> str:
+                async with semaphore:
+                    return await self.aget_decision_analysis(decision, aclient)
+            
+            return list(await asyncio.gather(*(analyze(d) for d in decisions)))
+    
+    def analyze_many(self, decisions: List[Dict]) -> List[str]:
+        """Blocking wrapper around aanalyze_many for sync callers"""
+        return asyncio.run(self.aanalyze_many(decisions))
+    
     def get_pattern_analysis(self) -> str:
         """Analyze patterns across all past decisions"""
         if not self.past_decisions:
@@ -224,13 +633,10 @@ Identify:
 Be specific and reference the actual decisions."""
         
         try:
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": pattern_prompt}],
-                max_tokens=800,
-                temperature=0.7,
+            return _complete(
+                self.model_big, [{"role": "user", "content": pattern_prompt}],
+                max_tokens=800, temperature=0.7, cache=True,
             )
-            return response.choices[0].message.content
         except Exception as e:
             return f"I couldn't analyze patterns: {str(e)}"
     
@@ -246,7 +652,7 @@ Be specific and reference the actual decisions."""
         else:
             updated['reflection'] = f"[AI Suggestions]:\n{new_insights}"
         
-        updated['updated_at'] = __import__('datetime').datetime.now().isoformat()
+        updated['updated_at'] = datetime.now().isoformat()
         
         return updated
 
@@ -254,10 +660,25 @@ Be specific and reference the actual decisions."""
 class ViewDecisionsAssistant:
     """AI assistant for reviewing past decisions"""
     
+    REVIEW_SYSTEM_PROMPT = """You are a helpful decision review assistant. Help the user explore and learn from their past decisions.
+
+Provide thoughtful, conversational responses. Reference specific decisions when relevant. Help them see patterns and learn from their experiences."""
+    
     def __init__(self, decisions: List[Dict] = None):
         self.decisions = decisions or []
         self.model = get_available_model()
-        self.conversation_history = []
+        self.conversation_history = deque(maxlen=HISTORY_MAXLEN)
+        self._decisions_version = 0
+        self._summaries_key = None
+        self._summaries = ""
+        # One normalized embedding per decision, rebuilt when the decisions change
+        self._embeddings_key = None
+        self._decision_embeddings = None
+    
+    def set_decisions(self, decisions: List[Dict]):
+        """Replace the decisions under review"""
+        self.decisions = decisions
+        self._decisions_version += 1
     
     def start_review_session(self) -> str:
         """Start decision review session"""
@@ -283,27 +704,27 @@ class ViewDecisionsAssistant:
             'content': user_query
         })
         
-        # Build context with decision summaries
-        decision_context = self._build_decision_summaries()
+        # Build context from the decisions closest to the query, or the most
+        # recent ones when embeddings aren't available
+        try:
+            relevant = self._relevant_decisions(user_query)
+        except Exception:
+            # Model download or encode failed; recent decisions still work
+            relevant = None
+        if relevant is not None:
+            decision_context = self._render_decision_summaries(relevant)
+        else:
+            decision_context = self._build_decision_summaries()
         
-        review_prompt = f"""You are a helpful decision review assistant. Help the user explore and learn from their past decisions.
-
-User's Decisions:
-{decision_context}
-
-User Query: {user_query}
-
-Provide thoughtful, conversational responses. Reference specific decisions when relevant. Help them see patterns and learn from their experiences."""
+        # Instructions and decisions go in system messages, the query as the user turn
+        messages = [
+            {"role": "system", "content": self.REVIEW_SYSTEM_PROMPT},
+            {"role": "system", "content": f"User's Decisions:\n{decision_context}"},
+            {"role": "user", "content": user_query},
+        ]
         
         try:
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": review_prompt}],
-                max_tokens=500,
-                temperature=0.7,
-            )
-            
-            ai_response = response.choices[0].message.content
+            ai_response = _complete(self.model, messages, max_tokens=500, temperature=0.7)
             self.conversation_history.append({
                 'role': 'assistant',
                 'content': ai_response
@@ -313,13 +734,43 @@ Provide thoughtful, conversational responses. Reference specific decisions when
         except Exception as e:
             return f"I couldn't process that: {str(e)}"
     
+    def _relevant_decisions(self, user_query: str) -> Optional[List[Dict]]:
+        """Top REVIEW_TOP_K decisions by cosine similarity to the query, or None to use recent ones"""
+        if not EMBEDDINGS_AVAILABLE or len(self.decisions) <= REVIEW_TOP_K:
+            return None
+        
+        model = embedder()
+        key = (id(self.decisions), len(self.decisions), self._decisions_version)
+        if key != self._embeddings_key:
+            texts = [d.get('description') or d.get('title', '') for d in self.decisions]
+            self._decision_embeddings = model.encode(texts, normalize_embeddings=True)
+            self._embeddings_key = key
+        
+        scores = self._decision_embeddings @ model.encode(user_query, normalize_embeddings=True)
+        top = np.argpartition(-scores, REVIEW_TOP_K)[:REVIEW_TOP_K]
+        top = top[np.argsort(-scores[top])]
+        return [self.decisions[i] for i in top]
+    
     def _build_decision_summaries(self) -> str:
         """Build summaries of all decisions"""
-        summaries = []
-        for i, d in enumerate(self.decisions[-5:], 1):
-            summary = f"{i}. {d.get('title', 'Decision')} - {d.get('description', '')[:80]}...\n"
+        key = (id(self.decisions), len(self.decisions), self._decisions_version)
+        if key != self._summaries_key:
+            self._summaries = self._render_decision_summaries(self.decisions[-5:])
+            self._summaries_key = key
+        return self._summaries
+    
+    def _render_decision_summaries(self, recent: List[Dict]) -> str:
+        if not recent:
+            return "No decisions to review yet."
+        
+        buf = io.StringIO()
+        write = buf.write
+        budget = max(20, REVIEW_SUMMARY_TOKENS // len(recent))
+        for i, d in enumerate(recent, 1):
+            if i > 1:
+                write("\n")
+            write(f"{i}. {d.get('title', 'Decision')} - {fit_tokens(d.get('description', ''), budget)}\n")
             if d.get('outcome_status'):
-                summary += f"   Status: {d['outcome_status']}\n"
-            summaries.append(summary)
+                write(f"   Status: {d['outcome_status']}\n")
         
-        return '\n'.join(summaries) if summaries else "No decisions to review yet."
+        return buf.getvalue()